@@ -0,0 +1,101 @@
+"""Best-available seat selection over a session's occupancy bitmap.
+
+Each row of the hall layout is scanned once for runs of free seats (a seat of
+the wanted type, not sold and not held). A run of length ``L`` holds
+``L - count + 1`` blocks, but the best of them is simply the one closest to
+the centre of the row, clamped into the run, so the whole search is
+O(rows x width) with a constant amount of work per run.
+
+Blocks are scored by the distance of their middle from the centre of the
+screen (column) and of the preferred row band. With ``contiguous`` off, a
+request no single run can satisfy falls back to the best individual seats.
+
+``services.book_best_available`` runs this under a per-session lock and books
+the result in the same transaction.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Set, Tuple
+
+from .occupancy import NO_SEAT, SessionOccupancy, type_code as seat_type_code
+
+SeatKey = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class Preferences:
+    count: int
+    seat_type: Optional[str] = None
+    row_from: Optional[int] = None
+    row_to: Optional[int] = None
+    centre: bool = True  # off: the frontmost block that fits
+    contiguous: bool = True
+
+
+def _row_score(row: int, first: int, last: int, prefs: Preferences) -> float:
+    if not prefs.centre:
+        return float(row)
+    # Slightly behind the middle of the allowed rows is the usual sweet spot.
+    return abs(row - (first + (last - first) * 0.6))
+
+
+def free_runs(occ: SessionOccupancy, row: int, type_code: Optional[int], blocked: Set[SeatKey]) -> List[Tuple[int, int]]:
+    """``(first, last)`` seat numbers of each run of bookable seats in ``row``."""
+    layout, bits = occ.layout, occ.bits
+    width = layout.width
+    base = (row - 1) * width
+    runs = []
+    start = None
+    for n in range(1, width + 1):
+        idx = base + n - 1
+        code = layout.cells[idx]
+        free = (code != NO_SEAT
+                and (type_code is None or code == type_code)
+                and not bits[idx >> 3] & (1 << (idx & 7))
+                and (row, n) not in blocked)
+        if free:
+            if start is None:
+                start = n
+        elif start is not None:
+            runs.append((start, n - 1))
+            start = None
+    if start is not None:
+        runs.append((start, width))
+    return runs
+
+
+def find_best(occ: SessionOccupancy, prefs: Preferences, blocked: Iterable[SeatKey] = ()) -> Optional[List[SeatKey]]:
+    """The best ``prefs.count`` seats, or ``None`` if they can't be found."""
+    layout = occ.layout
+    blocked = set(blocked)
+    type_code = seat_type_code(prefs.seat_type) if prefs.seat_type else None
+    first = max(prefs.row_from or 1, 1)
+    last = min(prefs.row_to or layout.rows, layout.rows)
+    centre_col = (layout.width + 1) / 2
+    count = prefs.count
+
+    best = None  # (score, row, start)
+    singles = []  # (score, row, number) for the non-contiguous fallback
+    for row in range(first, last + 1):
+        row_score = _row_score(row, first, last, prefs)
+        for run_first, run_last in free_runs(occ, row, type_code, blocked):
+            if run_last - run_first + 1 >= count:
+                if prefs.centre:
+                    ideal = round(centre_col - (count - 1) / 2)
+                    start = min(max(ideal, run_first), run_last - count + 1)
+                    score = row_score + abs(start + (count - 1) / 2 - centre_col)
+                else:
+                    start, score = run_first, row_score
+                if best is None or score < best[0]:
+                    best = (score, row, start)
+            if not prefs.contiguous and best is None:
+                singles.extend((row_score + abs(n - centre_col), row, n) for n in range(run_first, run_last + 1))
+
+    if best is not None:
+        _, row, start = best
+        return [(row, n) for n in range(start, start + count)]
+    if not prefs.contiguous and len(singles) >= count:
+        singles.sort()
+        return sorted((row, n) for _, row, n in singles[:count])
+    return None
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 class CinemaConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.cinema"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from . import events, holds
+        holds.store.listener = events.hold_changed
@@ -0,0 +1,137 @@
+"""Async variants of the public read endpoints.
+
+Same URLs and response bodies as ``ScheduleView``, ``SessionPublicView`` and
+``TicketPublicView``; routed instead of them when ASYNC_PUBLIC_VIEWS is on.
+Under ASGI a seat-map poll waiting on the database no longer ties up a worker
+thread. Everything else (auth, admin, writes) stays on the DRF views.
+
+``session_events`` is async-only: the seat map SSE stream fed by ``events``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+
+from . import caches, events
+from .models import Session, Ticket
+from .holds import store as hold_store
+from .occupancy import aget_hall_prices, aget_session_occupancy
+from .views import (
+    TICKET_RELATED, is_session_public, parse_schedule_day, render_schedule, schedule_sessions,
+    session_payload, session_values, ticket_payload,
+)
+
+
+def _json(data, status: int = 200) -> HttpResponse:
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type="application/json")
+
+
+def _not_found(exc: Http404) -> HttpResponse:
+    # Same body DRF's exception handler produces for Http404.
+    return _json({"detail": NotFound(*exc.args).detail}, status=404)
+
+
+@require_safe
+async def schedule(request):
+    try:
+        day = parse_schedule_day(request.GET.get("date"))
+    except ValueError:
+        return _json({"detail": "Некорректная дата."}, status=400)
+
+    version = await caches.aschedule_version(day)
+    entry = await caches.aget_schedule(version, day)
+    if entry is None:
+        data = await session_values.aserialize(schedule_sessions(day))
+        entry = await caches.astore_schedule(version, day, render_schedule(day, data))
+    return caches.conditional_json_response(request, entry)
+
+
+@require_safe
+async def session_detail(request, pk: int):
+    try:
+        session = await aget_object_or_404(Session.objects.select_related("hall", "movie"), pk=pk)
+    except Http404 as exc:
+        return _not_found(exc)
+    if not is_session_public(session):
+        return _json({"detail": "Сеанс недоступен."}, status=404)
+
+    occupancy = await aget_session_occupancy(session)
+    prices = await aget_hall_prices(session.hall)
+    held_seats = await sync_to_async(hold_store.held_seats)(pk)
+    return _json(session_payload(session, occupancy, prices, held_seats))
+
+
+@require_safe
+async def ticket_detail(request, code):
+    try:
+        ticket = await aget_object_or_404(Ticket.objects.select_related(*TICKET_RELATED), code=code)
+    except Http404 as exc:
+        return _not_found(exc)
+    return _json(ticket_payload(ticket))
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), ensure_ascii=False)}\n\n"
+
+
+async def _snapshot(pk: int) -> dict:
+    session = await Session.objects.select_related("hall").aget(pk=pk)
+    occupancy = await aget_session_occupancy(session)
+    held = [{"row": r, "seat": n} for r, n in await sync_to_async(hold_store.held_seats)(pk) if not occupancy.is_occupied(r, n)]
+    return {"version": occupancy.version, "occupied": occupancy.occupied(), "held": held}
+
+
+async def _event_stream(pk: int, subscription):
+    try:
+        yield "retry: 3000\n\n"
+        snapshot = await _snapshot(pk)
+        version = snapshot["version"]
+        yield _sse("snapshot", snapshot)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), settings.SEAT_EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is events.LAGGED:
+                snapshot = await _snapshot(pk)
+                version = snapshot["version"]
+                yield _sse("snapshot", snapshot)
+            elif "version" in event:
+                # Sales and cancellations already part of the snapshot this stream started from.
+                if event["version"] > version:
+                    version = event["version"]
+                    yield _sse(event["type"], event)
+            else:
+                yield _sse(event["type"], event)
+    finally:
+        subscription.close()
+
+
+@require_safe
+async def session_events(request, pk: int):
+    """Server-sent events with the seat map of a session: a snapshot, then deltas.
+
+    Needs the ASGI server; the subscription is opened before the snapshot is
+    read so no booking committed in between is missed.
+    """
+    try:
+        session = await aget_object_or_404(Session.objects.select_related("hall", "movie"), pk=pk)
+    except Http404 as exc:
+        return _not_found(exc)
+    if not is_session_public(session):
+        return _json({"detail": "Сеанс недоступен."}, status=404)
+
+    subscription = events.get_broker().subscribe(pk)
+    response = StreamingHttpResponse(_event_stream(pk, subscription), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,44 @@
+"""Small helpers shared by the benchmark management commands."""
+from __future__ import annotations
+
+import math
+from typing import Iterable, List, Optional
+
+from .models import Session, SessionStatus
+
+
+class Rollback(Exception):
+    """Raised inside ``transaction.atomic()`` to discard benchmark writes."""
+
+
+def bookable_session(pk: Optional[int] = None, hall_name: Optional[str] = None) -> Optional[Session]:
+    """Session ``pk``, else the earliest bookable session (of the hall named ``hall_name``)."""
+    qs = Session.objects.select_related("hall", "movie")
+    if pk:
+        return qs.filter(pk=pk).first()
+    qs = qs.filter(status=SessionStatus.ACTIVE, hall__is_active=True)
+    if hall_name is not None:
+        qs = qs.filter(hall__name=hall_name)
+    return qs.order_by("starts_at").first()
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples_ms: Iterable[float]) -> dict:
+    values = sorted(samples_ms)
+    if not values:
+        return {"n": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    return {
+        "n": len(values),
+        "mean_ms": round(sum(values) / len(values), 3),
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "max_ms": round(values[-1], 3),
+    }
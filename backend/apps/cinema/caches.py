@@ -0,0 +1,134 @@
+"""Rendered-response caches on top of Django's cache framework.
+
+Entries are keyed by version tokens that writers replace after commit, so a
+change never has to find and delete individual entries. The tokens live in
+the database (``CacheVersion``) and are read with one small query per
+request, so a write on one worker invalidates the entries of all of them;
+the rendered entries themselves may stay in the per-process default cache.
+A day's sales only replace that day's token.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+from datetime import date
+from typing import Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import CacheVersion
+
+SCHEDULE_VERSION_KEY = "schedule"
+MOVIES_VERSION_KEY = "movies"
+
+
+def _schedule_day_version_key(day: date) -> str:
+    return f"schedule:{day.isoformat()}"
+
+
+def _versions(keys: Tuple[str, ...]):
+    return CacheVersion.objects.filter(key__in=keys).values_list("key", "version")
+
+
+def _token(keys: Tuple[str, ...], rows: Iterable[Tuple[str, int]]) -> str:
+    versions = dict(rows)
+    return ".".join(str(versions.get(key, 0)) for key in keys)
+
+
+def _bump(key: str) -> None:
+    CacheVersion.objects.bulk_create(
+        [CacheVersion(key=key, version=time.time_ns())],
+        update_conflicts=True, unique_fields=["key"], update_fields=["version"],
+    )
+
+
+def schedule_version(day: date) -> str:
+    keys = (SCHEDULE_VERSION_KEY, _schedule_day_version_key(day))
+    return _token(keys, _versions(keys))
+
+
+async def aschedule_version(day: date) -> str:
+    keys = (SCHEDULE_VERSION_KEY, _schedule_day_version_key(day))
+    return _token(keys, [row async for row in _versions(keys)])
+
+
+def bump_schedule_version() -> None:
+    _bump(SCHEDULE_VERSION_KEY)
+
+
+def _schedule_key(version: str, day: date) -> str:
+    return f"cinema:schedule:{version}:{day.isoformat()}"
+
+
+def invalidate_schedule_day(day: date) -> None:
+    """Re-render one day's schedule (ticket sales change its counters only)."""
+    _bump(_schedule_day_version_key(day))
+
+
+def get_schedule(version: str, day: date) -> Optional[dict]:
+    return cache.get(_schedule_key(version, day))
+
+
+async def aget_schedule(version: str, day: date) -> Optional[dict]:
+    return await cache.aget(_schedule_key(version, day))
+
+
+def _json_entry(body: bytes) -> dict:
+    return {
+        "body": body,
+        "etag": '"%s"' % hashlib.sha1(body).hexdigest(),
+        "last_modified": int(time.time()),
+    }
+
+
+def store_schedule(version: str, day: date, body: bytes) -> dict:
+    entry = _json_entry(body)
+    cache.set(_schedule_key(version, day), entry, settings.SCHEDULE_CACHE_SECONDS)
+    return entry
+
+
+async def astore_schedule(version: str, day: date, body: bytes) -> dict:
+    entry = _json_entry(body)
+    await cache.aset(_schedule_key(version, day), entry, settings.SCHEDULE_CACHE_SECONDS)
+    return entry
+
+
+def movies_version() -> str:
+    keys = (MOVIES_VERSION_KEY,)
+    return _token(keys, _versions(keys))
+
+
+def bump_movies_version() -> None:
+    _bump(MOVIES_VERSION_KEY)
+
+
+def movie_page_key(version: str, request, params: dict) -> str:
+    """Key of one catalogue page; ``params`` are the normalized query parameters."""
+    raw = "|".join([request.get_host(), *(f"{k}={params[k]}" for k in sorted(params))])
+    return f"cinema:movies:{version}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+def get_movie_page(key: str) -> Optional[dict]:
+    return cache.get(key)
+
+
+def store_movie_page(key: str, body: bytes) -> dict:
+    # Short TTL: only popular queries stay around, and archive edits show up soon anyway.
+    entry = _json_entry(body)
+    cache.set(key, entry, settings.MOVIE_SEARCH_CACHE_SECONDS)
+    return entry
+
+
+def conditional_json_response(request, entry: dict) -> HttpResponse:
+    """Answer with 304 when the client already has ``entry``, else send its body."""
+    response = get_conditional_response(request, etag=entry["etag"], last_modified=entry["last_modified"])
+    if response is None:
+        response = HttpResponse(entry["body"], content_type="application/json")
+    response["ETag"] = entry["etag"]
+    response["Last-Modified"] = http_date(entry["last_modified"])
+    response["Cache-Control"] = "no-cache"
+    return response
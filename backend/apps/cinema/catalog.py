@@ -0,0 +1,37 @@
+"""Movie catalogue search.
+
+A query matches a movie by full-text search over title and description
+(``MOVIE_SEARCH_VECTOR``, Russian stemming, websearch syntax) or by trigram
+word similarity to the title, which catches typos and partial words. Both
+conditions are served by the GIN indexes on ``Movie``, and Postgres ORs the
+two bitmap scans, so archive titles never get scanned row by row:
+
+* ``search`` repeats the ``movie_search_vector`` index expression verbatim
+  (an alias, so it is not computed again for the select list);
+* ``trigram_word_similar`` compiles to ``title %> q``, column on the left,
+  which ``gin_trgm_ops`` indexes. The cut-off is Postgres'
+  ``pg_trgm.word_similarity_threshold`` (0.6 by default); a filter on a
+  computed ``word_similarity()`` value would not use the index.
+"""
+from __future__ import annotations
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import Q
+
+from .models import MOVIE_SEARCH_VECTOR
+
+MAX_QUERY_LENGTH = 100
+
+
+def normalize_query(q: str) -> str:
+    return " ".join(q.split())[:MAX_QUERY_LENGTH]
+
+
+def search_movies(queryset, q: str):
+    """Movies of ``queryset`` matching ``q``, best matches first."""
+    query = SearchQuery(q, config="russian", search_type="websearch")
+    return (queryset
+        .alias(search=MOVIE_SEARCH_VECTOR)
+        .filter(Q(search=query) | Q(title__trigram_word_similar=q))
+        .annotate(rank=SearchRank(MOVIE_SEARCH_VECTOR, query), similarity=TrigramWordSimilarity(q, "title"))
+        .order_by("-rank", "-similarity", "title", "id"))
@@ -0,0 +1,202 @@
+"""Seat map change events for the per-session SSE stream.
+
+Writers call ``publish(session_id, event)`` after commit; every open stream of
+that session gets the event through the broker named by SEAT_EVENTS_BROKER:
+
+* ``LocalBroker`` fans out inside the current process only. It is enough for a
+  single ASGI worker and serves as the stand-in in tests.
+* ``PostgresBroker`` sends events through NOTIFY and runs one LISTEN thread per
+  process, so bookings made by any worker reach every worker's streams. The
+  NOTIFYs go out from a publisher thread, so ``publish`` never touches the
+  caller's connection and is safe from async code and from the hold sweeper.
+
+Events are small dicts: ``occupied`` and ``freed`` (seats sold or released by
+a cancellation, plus the new occupancy version), ``held`` and ``released``
+(temporary holds) and ``cancelled`` (the whole session).
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import queue
+import threading
+from typing import Dict, Optional, Set
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+LAGGED = {"type": "lagged"}
+
+
+class Subscription:
+    """Queue of events for one stream; lives on the event loop that created it."""
+
+    def __init__(self, broker: "LocalBroker", session_id: int, maxsize: int):
+        self.broker = broker
+        self.session_id = session_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def _deliver(self, event: dict) -> None:
+        # A reader that falls this far behind gets one LAGGED marker and should resync.
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(LAGGED)
+        else:
+            self.queue.put_nowait(event)
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subs: Dict[int, Set[Subscription]] = {}
+
+    def subscribe(self, session_id: int) -> Subscription:
+        sub = Subscription(self, session_id, self.queue_size)
+        with self._lock:
+            self._subs.setdefault(session_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.session_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.session_id]
+
+    def subscribers(self, session_id: int) -> int:
+        with self._lock:
+            return len(self._subs.get(session_id, ()))
+
+    def publish(self, session_id: int, event: dict) -> None:
+        self.dispatch(session_id, event)
+
+    def dispatch(self, session_id: int, event: dict) -> None:
+        """Hand ``event`` to this process's subscribers; callable from any thread."""
+        with self._lock:
+            subs = list(self._subs.get(session_id, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub._deliver, event)
+            except RuntimeError:  # loop already closed
+                self.unsubscribe(sub)
+
+
+class PostgresBroker(LocalBroker):
+    channel = "cinema_seat_events"
+
+    def __init__(self, queue_size: int = 256):
+        super().__init__(queue_size)
+        self._listener: Optional[threading.Thread] = None
+        self._publisher: Optional[threading.Thread] = None
+        self._outbox: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        self._threads_lock = threading.Lock()
+
+    def subscribe(self, session_id: int) -> Subscription:
+        self._ensure_threads()
+        return super().subscribe(session_id)
+
+    def publish(self, session_id: int, event: dict) -> None:
+        # Callers include async views and the hold sweeper thread, so the NOTIFY
+        # itself is sent by the publisher thread on its own connection.
+        self._ensure_threads()
+        self._outbox.put(json.dumps({"session": session_id, "event": event}, separators=(",", ":")))
+
+    def close(self) -> None:
+        """Stop the publisher after it has sent everything queued so far."""
+        self._outbox.put(None)
+        if self._publisher is not None:
+            self._publisher.join()
+
+    def _ensure_threads(self) -> None:
+        if self._listener is not None:
+            return
+        with self._threads_lock:
+            if self._listener is None:
+                self._publisher = threading.Thread(target=self._publish_forever, name="seat-events-publisher", daemon=True)
+                self._publisher.start()
+                self._listener = threading.Thread(target=self._listen, name="seat-events-listener", daemon=True)
+                self._listener.start()
+
+    def _publish_forever(self) -> None:
+        try:
+            while True:
+                payload = self._outbox.get()
+                if payload is None:
+                    return
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+                except Exception:
+                    # Streams resync on reconnect; drop the connection so the next event gets a fresh one.
+                    logger.exception("Failed to publish seat event %s", payload)
+                    connection.close()
+        finally:
+            connection.close()
+
+    def _listen(self) -> None:
+        while True:
+            conn = None
+            try:
+                conn = connection.get_new_connection(connection.get_connection_params())
+                conn.autocommit = True
+                conn.execute(f"LISTEN {self.channel}")
+                for notify in conn.notifies():
+                    message = json.loads(notify.payload)
+                    self.dispatch(message["session"], message["event"])
+            except Exception:
+                logger.exception("Seat event listener failed, reconnecting")
+                threading.Event().wait(1)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+_broker: Optional[LocalBroker] = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> LocalBroker:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.SEAT_EVENTS_BROKER)()
+    return _broker
+
+
+def set_broker(broker: Optional[LocalBroker]) -> None:
+    """Swap the broker (``None`` re-reads the setting on next use)."""
+    global _broker
+    with _broker_lock:
+        _broker = broker
+
+
+def publish(session_id: int, event: dict) -> None:
+    try:
+        get_broker().publish(session_id, event)
+    except Exception:
+        # Streams resync on reconnect; a lost event must not break the write path.
+        logger.exception("Failed to publish seat event for session %s", session_id)
+
+
+def seats_event(kind: str, session_id: int, seats, **extra) -> None:
+    publish(session_id, {"type": kind, "seats": [{"row": r, "seat": n} for r, n in seats], **extra})
+
+
+def hold_changed(kind: str, hold) -> None:
+    """HoldStore listener: a hold was placed or dropped (released, confirmed or expired)."""
+    seats_event("held" if kind == "hold" else "released", hold.session_id, hold.seats)
@@ -0,0 +1,152 @@
+"""Read-only serialization straight from ``.values()`` rows.
+
+``ValuesSerializer`` takes an existing DRF serializer class and compiles its
+readable fields once into a flat list of ``.values()`` lookups plus the field
+converters DRF itself would call. Serializing then skips model instantiation
+and per-object field binding, while the output (and therefore the rendered
+JSON) stays the same as ``SerializerClass(queryset, many=True).data``.
+
+Nested serializers follow foreign keys through ``__`` lookups; nested
+``many=True`` serializers (reverse foreign keys) are loaded with one extra
+query per relation for the whole page of parents. Nested objects are built
+once per primary key and shared between rows, so treat the result as
+read-only.
+"""
+from __future__ import annotations
+
+from typing import Iterable, List
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+
+from .metrics import serializing
+
+_FIELD, _DATETIME, _NESTED, _MANY = range(4)
+_IN_BATCH = 5000  # parent keys per child query, well below driver parameter limits
+
+# Fields whose to_representation() returns what .values() already gives.
+_PASSTHROUGH = (
+    serializers.ReadOnlyField,
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+    PrimaryKeyRelatedField,
+)
+
+
+class ValuesSerializer:
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.lookups: List[str] = []
+        self._many = []
+        self._plan = self._compile(serializer_class(), self.model, "")
+        self._pk_lookup = self._add_lookup(self.model._meta.pk.name)
+
+    def _add_lookup(self, lookup: str) -> str:
+        if lookup not in self.lookups:
+            self.lookups.append(lookup)
+        return lookup
+
+    def _compile(self, serializer, model, prefix: str) -> list:
+        plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == "*":
+                raise ValueError(f"{type(serializer).__name__}.{name}: source='*' is not supported")
+            path = field.source.replace(".", "__")
+            if isinstance(field, serializers.ListSerializer):
+                if prefix:
+                    raise ValueError(f"{name}: many=True is only supported at the top level")
+                fk = getattr(model, field.source).field
+                child = ValuesSerializer(type(field.child))
+                self._many.append((name, fk, child))
+                plan.append((_MANY, name, None, None))
+            elif isinstance(field, serializers.BaseSerializer):
+                related = model._meta.get_field(field.source).related_model
+                pk_lookup = self._add_lookup(f"{prefix}{path}__{related._meta.pk.name}")
+                plan.append((_NESTED, name, pk_lookup, self._compile(field, related, f"{prefix}{path}__")))
+            elif _is_plain_iso_datetime(field):
+                plan.append((_DATETIME, name, self._add_lookup(prefix + path), None))
+            else:
+                convert = None if isinstance(field, _PASSTHROUGH) else field.to_representation
+                plan.append((_FIELD, name, self._add_lookup(prefix + path), convert))
+        return plan
+
+    def _build(self, plan, row, ctx) -> dict:
+        out = {}
+        for kind, name, lookup, payload in plan:
+            if kind == _FIELD:
+                value = row[lookup]
+                out[name] = value if payload is None or value is None else payload(value)
+            elif kind == _DATETIME:
+                value = row[lookup]
+                out[name] = _iso_datetime(value, ctx["tz"]) if value else None
+            elif kind == _NESTED:
+                pk = row[lookup]
+                if pk is None:
+                    out[name] = None
+                else:
+                    key = (lookup, pk)
+                    nested = ctx["nested"].get(key)
+                    if nested is None:
+                        nested = ctx["nested"][key] = self._build(payload, row, ctx)
+                    out[name] = nested
+            else:
+                out[name] = ctx["many"][name].get(row[self._pk_lookup], [])
+        return out
+
+    def serialize(self, queryset) -> List[dict]:
+        rows = list(queryset.prefetch_related(None).values(*self.lookups))
+        return self.serialize_rows(rows)
+
+    async def aserialize(self, queryset) -> List[dict]:
+        if self._many:
+            return await sync_to_async(self.serialize)(queryset)
+        rows = [row async for row in queryset.prefetch_related(None).values(*self.lookups)]
+        return self.serialize_rows(rows)
+
+    def serialize_rows(self, rows: Iterable[dict]) -> List[dict]:
+        with serializing():
+            return self._serialize_rows(rows)
+
+    def _serialize_rows(self, rows: Iterable[dict]) -> List[dict]:
+        rows = list(rows)
+        many = {}
+        ctx = {"tz": timezone.get_current_timezone(), "nested": {}, "many": many}
+        if self._many:
+            pks = [row[self._pk_lookup] for row in rows]
+            for name, fk, child in self._many:
+                grouped = {}
+                child_ctx = {"tz": ctx["tz"], "nested": {}, "many": {}}
+                for start in range(0, len(pks), _IN_BATCH):
+                    children = (fk.model.objects
+                        .filter(**{f"{fk.name}__in": pks[start:start + _IN_BATCH]})
+                        .order_by(fk.model._meta.pk.name)
+                        .values(fk.attname, *child.lookups))
+                    for child_row in children:
+                        grouped.setdefault(child_row[fk.attname], []).append(child._build(child._plan, child_row, child_ctx))
+                many[name] = grouped
+        return [self._build(self._plan, row, ctx) for row in rows]
+
+
+def _is_plain_iso_datetime(field) -> bool:
+    # Same output as DateTimeField.to_representation with the default settings,
+    # minus the per-value current-timezone lookup.
+    return (type(field) is serializers.DateTimeField
+            and not hasattr(field, "timezone")
+            and getattr(field, "format", api_settings.DATETIME_FORMAT) == ISO_8601)
+
+
+def _iso_datetime(value, tz) -> str:
+    if timezone.is_aware(value):
+        value = value.astimezone(tz)
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
@@ -0,0 +1,250 @@
+"""Temporary seat holds.
+
+A hold reserves a set of seats of a session for a few minutes so the customer
+can fill in contact details without racing other buyers. The store is picked
+by SEAT_HOLD_STORE:
+
+* ``DatabaseHoldStore`` (default) keeps one ``HeldSeat`` row per held seat; a
+  unique constraint on (session, row, seat) makes a hold taken by any worker
+  block every other worker, and its sweeper deletes expired rows with
+  ``SKIP LOCKED`` so each expiry is announced once.
+* ``HoldStore`` keeps holds in process memory. Expired holds are dropped
+  lazily on every access (a min-heap of deadlines makes that O(expired)) and
+  by the sweeper thread. Holds are not shared between processes, so it is
+  only correct with a single worker process (tests, ``runserver``).
+
+Both call ``listener("hold" | "drop", hold)`` after the change is visible.
+"""
+from __future__ import annotations
+
+import heapq
+import logging
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import HeldSeat
+
+logger = logging.getLogger(__name__)
+
+SeatKey = Tuple[int, int]
+
+
+def seats_label(seats: Iterable[SeatKey]) -> str:
+    return "; ".join(f"ряд {r}, место {n}" for r, n in seats)
+
+
+class SeatsHeld(Exception):
+    def __init__(self, seats: List[SeatKey]):
+        self.seats = seats
+        super().__init__("Места временно забронированы другим покупателем: " + seats_label(seats) + ".")
+
+
+@dataclass(frozen=True)
+class Hold:
+    token: str
+    session_id: int
+    seats: Tuple[SeatKey, ...]
+    expires_at: float  # unix time
+
+    @property
+    def expires_at_dt(self) -> datetime:
+        return datetime.fromtimestamp(self.expires_at, tz=dt_timezone.utc)
+
+
+class HoldStore:
+    """In-process holds: fast, but only correct with a single worker process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._holds: Dict[str, Hold] = {}
+        self._seats: Dict[int, Dict[SeatKey, str]] = {}  # session -> seat -> token
+        self._deadlines: List[Tuple[float, str]] = []
+        # Called outside the lock as listener("hold" | "drop", hold).
+        self.listener: Optional[Callable[[str, Hold], None]] = None
+
+    def hold(self, session_id: int, seats: Iterable[SeatKey], ttl_seconds: float) -> Hold:
+        seats = tuple(seats)
+        with self._lock:
+            now = time.time()
+            dropped = self._sweep(now)
+            taken = self._seats.get(session_id, {})
+            conflicts = [seat for seat in seats if seat in taken]
+            if not conflicts:
+                hold = Hold(secrets.token_urlsafe(16), session_id, seats, now + ttl_seconds)
+                self._holds[hold.token] = hold
+                self._seats.setdefault(session_id, {}).update((seat, hold.token) for seat in seats)
+                heapq.heappush(self._deadlines, (hold.expires_at, hold.token))
+        self._notify("drop", dropped)
+        if conflicts:
+            raise SeatsHeld(conflicts)
+        self._notify("hold", [hold])
+        return hold
+
+    def get(self, token: str) -> Optional[Hold]:
+        with self._lock:
+            dropped = self._sweep(time.time())
+            hold = self._holds.get(token)
+        self._notify("drop", dropped)
+        return hold
+
+    def release(self, token: str) -> bool:
+        with self._lock:
+            hold = self._drop(token)
+        self._notify("drop", [hold] if hold else [])
+        return hold is not None
+
+    def held_seats(self, session_id: int) -> List[SeatKey]:
+        with self._lock:
+            dropped = self._sweep(time.time())
+            seats = sorted(self._seats.get(session_id, ()))
+        self._notify("drop", dropped)
+        return seats
+
+    def conflicts(self, session_id: int, seats: Iterable[SeatKey], token: Optional[str] = None) -> List[SeatKey]:
+        """Seats from ``seats`` held by anyone except ``token``."""
+        with self._lock:
+            dropped = self._sweep(time.time())
+            taken = self._seats.get(session_id) or {}
+            conflicts = [seat for seat in seats if taken.get(seat, token) != token]
+        self._notify("drop", dropped)
+        return conflicts
+
+    def sweep(self) -> int:
+        with self._lock:
+            dropped = self._sweep(time.time())
+        self._notify("drop", dropped)
+        return len(dropped)
+
+    def _sweep(self, now: float) -> List[Hold]:
+        dropped = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, token = heapq.heappop(self._deadlines)
+            hold = self._drop(token)
+            if hold is not None:
+                dropped.append(hold)
+        return dropped
+
+    def _drop(self, token: str) -> Optional[Hold]:
+        hold = self._holds.pop(token, None)
+        if hold is None:
+            return None
+        taken = self._seats.get(hold.session_id, {})
+        for seat in hold.seats:
+            if taken.get(seat) == token:
+                del taken[seat]
+        if not taken:
+            self._seats.pop(hold.session_id, None)
+        return hold
+
+    def _notify(self, kind: str, holds: List[Hold]) -> None:
+        listener = self.listener
+        if listener is not None:
+            for hold in holds:
+                listener(kind, hold)
+
+
+class DatabaseHoldStore:
+    """Same interface as ``HoldStore``, shared by all workers through ``HeldSeat``."""
+
+    def __init__(self):
+        self.listener: Optional[Callable[[str, Hold], None]] = None
+
+    def hold(self, session_id: int, seats: Iterable[SeatKey], ttl_seconds: float) -> Hold:
+        seats = tuple(seats)
+        now = timezone.now()
+        hold = Hold(secrets.token_urlsafe(16), session_id, seats, (now + timedelta(seconds=ttl_seconds)).timestamp())
+        # Expired holds of this session would trip the unique constraint.
+        self._drop(session_id=session_id, expires_at__lte=now)
+        try:
+            with transaction.atomic():
+                HeldSeat.objects.bulk_create([
+                    HeldSeat(token=hold.token, session_id=session_id, row=r, number=n, expires_at=hold.expires_at_dt)
+                    for r, n in seats
+                ])
+        except IntegrityError:
+            taken = set(self._active(session_id=session_id).values_list("row", "number"))
+            raise SeatsHeld([seat for seat in seats if seat in taken] or list(seats))
+        transaction.on_commit(lambda: self._notify("hold", [hold]))
+        return hold
+
+    def get(self, token: str) -> Optional[Hold]:
+        holds = self._group(self._active(token=token).values_list("token", "session_id", "row", "number", "expires_at"))
+        return holds[0] if holds else None
+
+    def release(self, token: str) -> bool:
+        return bool(self._drop(token=token))
+
+    def held_seats(self, session_id: int) -> List[SeatKey]:
+        return sorted(self._active(session_id=session_id).values_list("row", "number"))
+
+    def conflicts(self, session_id: int, seats: Iterable[SeatKey], token: Optional[str] = None) -> List[SeatKey]:
+        """Seats from ``seats`` held by anyone except ``token``."""
+        taken = {(r, n): t for r, n, t in self._active(session_id=session_id).values_list("row", "number", "token")}
+        return [seat for seat in seats if taken.get(seat, token) != token]
+
+    def sweep(self) -> int:
+        return len(self._drop(expires_at__lte=timezone.now()))
+
+    def _active(self, **filters):
+        return HeldSeat.objects.filter(expires_at__gt=timezone.now(), **filters)
+
+    def _drop(self, **filters) -> List[Hold]:
+        with transaction.atomic():
+            # Another worker deleting the same rows skips them, so each drop is announced once.
+            rows = list(HeldSeat.objects.filter(**filters).select_for_update(skip_locked=True)
+                        .values_list("pk", "token", "session_id", "row", "number", "expires_at"))
+            if rows:
+                HeldSeat.objects.filter(pk__in=[row[0] for row in rows]).delete()
+        dropped = self._group(row[1:] for row in rows)
+        if dropped:
+            transaction.on_commit(lambda: self._notify("drop", dropped))
+        return dropped
+
+    @staticmethod
+    def _group(rows) -> List[Hold]:
+        grouped: Dict[str, list] = {}
+        for token, session_id, row, number, expires_at in rows:
+            grouped.setdefault(token, [session_id, [], expires_at])[1].append((row, number))
+        return [Hold(token, session_id, tuple(sorted(seats)), expires_at.timestamp())
+                for token, (session_id, seats, expires_at) in grouped.items()]
+
+    _notify = HoldStore._notify
+
+
+store = import_string(settings.SEAT_HOLD_STORE)()
+_sweeper: Optional[threading.Thread] = None
+_sweeper_lock = threading.Lock()
+
+
+def _sweep_forever(interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            store.sweep()
+        except Exception:
+            logger.exception("Seat hold sweep failed")
+        finally:
+            # The thread lives for the whole process; don't keep a connection open between sweeps.
+            connection.close()
+
+
+def ensure_sweeper() -> None:
+    global _sweeper
+    if _sweeper is not None:
+        return
+    with _sweeper_lock:
+        if _sweeper is None:
+            _sweeper = threading.Thread(
+                target=_sweep_forever, args=(settings.SEAT_HOLD_SWEEP_SECONDS,),
+                name="seat-hold-sweeper", daemon=True,
+            )
+            _sweeper.start()
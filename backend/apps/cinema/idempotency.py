@@ -0,0 +1,88 @@
+"""Idempotency-Key for public booking requests.
+
+A client that retries ``sessions/<pk>/book/`` with the same key gets the
+booking the first attempt made instead of a second booking or a 409.
+
+* ``replay()`` runs before any booking work: a key already stored with a
+  booking returns that booking, one stored for a different request body is
+  ``KeyReused`` (422).
+* ``claim()`` is the first statement of ``create_booking``'s transaction, so
+  the key row commits or rolls back together with the booking. A concurrent
+  duplicate blocks on the key's primary key until the first attempt finishes
+  and then gets ``DuplicateRequest`` (replay it) or, if the first one failed,
+  books normally.
+
+Keys are scoped to the customer's contact (``scoped_key``), so two unrelated
+clients that happen to send the same key don't collide. Keys live
+BOOKING_IDEMPOTENCY_TTL_HOURS; ``purge_booking_keys`` drops old rows.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Booking, BookingRequestKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 128
+
+
+class KeyReused(Exception):
+    def __init__(self):
+        super().__init__("Idempotency-Key уже использован для другого запроса.")
+
+
+class DuplicateRequest(Exception):
+    """The same key was committed by a concurrent request; replay it."""
+
+
+def scoped_key(key: str, data: dict) -> str:
+    """The stored key: the client's key hashed together with the customer contact."""
+    contact = f"{(data.get('customer_email') or '').lower()}|{data.get('customer_phone') or ''}"
+    return hashlib.sha256(f"{contact}|{key}".encode()).hexdigest()
+
+
+def fingerprint(session_id: int, data: dict) -> str:
+    body = json.dumps({"session": session_id, **data}, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def expires_before():
+    return timezone.now() - timedelta(hours=settings.BOOKING_IDEMPOTENCY_TTL_HOURS)
+
+
+def replay(key: str, fp: str) -> Optional[Booking]:
+    """The booking already made under ``key``, if any (``None`` if it expired or was deleted)."""
+    entry = BookingRequestKey.objects.filter(pk=key).first()
+    if entry is None:
+        return None
+    if entry.created_at < expires_before():
+        entry.delete()
+        return None
+    if entry.fingerprint != fp:
+        raise KeyReused()
+    return (Booking.objects
+        .select_related("session__hall", "session__movie")
+        .prefetch_related("tickets")
+        .filter(pk=entry.booking_id)
+        .first())
+
+
+def claim(key: str, fp: str) -> BookingRequestKey:
+    """Insert the key row in the current transaction (see module docstring)."""
+    try:
+        with transaction.atomic():
+            return BookingRequestKey.objects.create(key=key, fingerprint=fp)
+    except IntegrityError:
+        raise DuplicateRequest()
+
+
+def purge() -> int:
+    deleted, _ = BookingRequestKey.objects.filter(created_at__lt=expires_before()).delete()
+    return deleted
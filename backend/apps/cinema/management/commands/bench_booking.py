@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.cinema.bench import Rollback, bookable_session, summarize
+from apps.cinema.occupancy import get_session_occupancy
+from apps.cinema.services import create_booking
+
+
+class Command(BaseCommand):
+    help = "Measure create_booking latency (p50/p99) for growing seat counts. All writes are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--session", type=int, help="Session id (default: first bookable session)")
+        parser.add_argument("--counts", default="1,2,5,10,20,30,40,50", help="Comma separated seat counts (default: 1..50)")
+        parser.add_argument("--repeat", type=int, default=50, help="Bookings per seat count (default: 50)")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    def handle(self, *args, **opts):
+        counts = [int(c) for c in opts["counts"].split(",") if c.strip()]
+        session = bookable_session(opts["session"])
+        if session is None:
+            raise CommandError("Нет подходящего сеанса. Запустите `python manage.py seed --open`.")
+        occ = get_session_occupancy(session)
+        free = [(s["row"], s["seat"]) for s in occ.layout.seat_map() if not occ.is_occupied(s["row"], s["seat"])]
+        if max(counts) > len(free):
+            raise CommandError(f"В сеансе {session.pk} только {len(free)} свободных мест.")
+
+        results = []
+        for count in counts:
+            seats = free[:count]
+            with CaptureQueriesContext(connection) as ctx:
+                self._book(session, seats)
+            samples = []
+            for _ in range(opts["repeat"]):
+                samples.append(self._book(session, seats))
+            results.append({"seats": count, "queries": len(ctx.captured_queries), **summarize(samples)})
+
+        if opts["json"]:
+            self.stdout.write(json.dumps({"session": session.pk, "results": results}, indent=2))
+            return
+        self.stdout.write(f"session {session.pk}, {opts['repeat']} bookings per row")
+        self.stdout.write(f"{'seats':>6} {'queries':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for r in results:
+            self.stdout.write(f"{r['seats']:>6} {r['queries']:>8} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['max_ms']:>9.2f}")
+
+    def _book(self, session, seats) -> float:
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                create_booking(
+                    session_id=session.pk,
+                    customer_name="bench",
+                    customer_email="bench@example.com",
+                    customer_phone=None,
+                    seats=seats,
+                )
+                elapsed = (time.perf_counter() - started) * 1000
+                raise Rollback
+        except Rollback:
+            pass
+        return elapsed
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from itertools import cycle
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.cinema.bench import summarize
+from apps.cinema.models import Session, SessionStatus, Ticket
+
+
+class Command(BaseCommand):
+    help = ("Hit the public read endpoints of a running server at increasing concurrency and report "
+            "throughput and latency percentiles. Run it once against the sync views and once with "
+            "ASYNC_PUBLIC_VIEWS=1, e.g. under `uvicorn config.asgi:application --workers 1`.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="Server root (default: http://127.0.0.1:8000)")
+        parser.add_argument("--paths", help="Comma separated paths (default: schedule, a session seat map and a ticket)")
+        parser.add_argument("--concurrency", default="1,8,32,128", help="Comma separated client counts")
+        parser.add_argument("--requests", type=int, default=2000, help="Requests per concurrency level (default: 2000)")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+
+    def handle(self, *args, **opts):
+        paths = [p.strip() for p in opts["paths"].split(",")] if opts["paths"] else self._default_paths()
+        urls = [opts["base_url"].rstrip("/") + p for p in paths if p]
+        if not urls:
+            raise CommandError("Нет путей для нагрузки.")
+        levels = [int(c) for c in opts["concurrency"].split(",") if c.strip()]
+        report = {
+            "base_url": opts["base_url"],
+            "paths": paths,
+            "levels": [self._run_level(urls, level, opts["requests"], opts["timeout"]) for level in levels],
+        }
+
+        body = json.dumps(report, indent=2)
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as f:
+                f.write(body + "\n")
+            self.stderr.write(f"Report written to {opts['output']}")
+        else:
+            self.stdout.write(body)
+
+    def _default_paths(self):
+        paths = ["/api/schedule/"]
+        session = Session.objects.filter(status=SessionStatus.ACTIVE, hall__is_active=True).order_by("starts_at").first()
+        if session is not None:
+            paths.append(f"/api/sessions/{session.pk}/")
+        ticket = Ticket.objects.order_by("-id").first()
+        if ticket is not None:
+            paths.append(f"/api/tickets/{ticket.code}/")
+        return paths
+
+    def _run_level(self, urls, concurrency: int, total: int, timeout: float) -> dict:
+        lock = threading.Lock()
+        remaining = [total]
+        latencies = []
+        statuses = {}
+
+        def worker(offset: int):
+            targets = cycle(urls[offset % len(urls):] + urls[:offset % len(urls)])
+            while True:
+                with lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                url = next(targets)
+                started = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(url, timeout=timeout) as resp:
+                        resp.read()
+                        status = resp.status
+                except urllib.error.HTTPError as e:
+                    status = e.code
+                except (urllib.error.URLError, OSError):
+                    status = "error"
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duration = time.perf_counter() - t0
+        return {
+            "concurrency": concurrency,
+            "requests": len(latencies),
+            "duration_s": round(duration, 3),
+            "rps": round(len(latencies) / duration, 2) if duration else 0.0,
+            "statuses": {str(k): v for k, v in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+            "latency_ms": summarize(latencies),
+        }
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.cinema.bench import Rollback
+from apps.cinema.models import Booking, Hall, Movie, Seat, Session, Ticket
+from apps.cinema.serializers import BookingSerializer, SessionSerializer
+from apps.cinema.views import booking_values, session_values
+
+
+class Command(BaseCommand):
+    help = ("Compare DRF ModelSerializer and .values() serialization of sessions and bookings "
+            "on generated data (1k-100k rows). All writes are rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000", help="Comma separated row counts")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, best one is reported")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    def handle(self, *args, **opts):
+        sizes = [int(s) for s in opts["sizes"].split(",") if s.strip()]
+        results = []
+        for size in sizes:
+            try:
+                with transaction.atomic():
+                    self._generate(size)
+                    results.append(self._compare("sessions", size, opts["repeat"],
+                        Session.objects.select_related("movie", "hall").filter(movie__title="bench").order_by("starts_at"),
+                        SessionSerializer, session_values))
+                    results.append(self._compare("bookings", size, opts["repeat"],
+                        Booking.objects.select_related("session", "session__movie", "session__hall")
+                            .prefetch_related("tickets").filter(customer_name="bench").order_by("-created_at"),
+                        BookingSerializer, booking_values))
+                    raise Rollback
+            except Rollback:
+                pass
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'kind':>9} {'rows':>7} {'drf ms':>10} {'values ms':>10} {'speedup':>8}")
+        for r in results:
+            self.stdout.write(f"{r['kind']:>9} {r['rows']:>7} {r['drf_ms']:>10.1f} {r['values_ms']:>10.1f} {r['speedup']:>7.1f}x")
+
+    def _generate(self, size: int) -> None:
+        hall = Hall.objects.create(name=f"bench-{time.time_ns()}", rows_count=1, seats_per_row=1, is_active=True)
+        seat = Seat.objects.create(hall=hall, row=1, number=1)
+        movie = Movie.objects.create(title="bench", duration_minutes=90)
+        start = timezone.now() + timedelta(days=3650)
+        sessions = Session.objects.bulk_create(
+            Session(hall=hall, movie=movie, starts_at=start + timedelta(hours=2 * i),
+                    ends_at=start + timedelta(hours=2 * i, minutes=90))
+            for i in range(size)
+        )
+        bookings = Booking.objects.bulk_create(
+            Booking(session=s, customer_name="bench", customer_email="bench@example.com") for s in sessions
+        )
+        Ticket.objects.bulk_create(
+            Ticket(booking=b, session=s, seat=seat, row_snapshot=1, seat_snapshot=1,
+                   seat_type_snapshot=seat.seat_type, price_snapshot=300)
+            for b, s in zip(bookings, sessions)
+        )
+
+    def _compare(self, kind, size, repeat, queryset, serializer_class, values_serializer) -> dict:
+        render = JSONRenderer().render
+        drf_ms, drf_body = self._best(repeat, lambda: render(serializer_class(queryset.all(), many=True).data))
+        values_ms, values_body = self._best(repeat, lambda: render(values_serializer.serialize(queryset.all())))
+        if drf_body != values_body:
+            raise CommandError(f"{kind}: JSON differs between DRF and .values() serialization")
+        return {
+            "kind": kind,
+            "rows": size,
+            "drf_ms": round(drf_ms, 1),
+            "values_ms": round(values_ms, 1),
+            "speedup": round(drf_ms / values_ms, 2) if values_ms else 0.0,
+            "bytes": len(drf_body),
+        }
+
+    def _best(self, repeat, fn):
+        best, body = None, None
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            body = fn()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best, body
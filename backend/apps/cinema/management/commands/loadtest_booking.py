@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import F
+from django.http import Http404
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.cinema import reports
+from apps.cinema.bench import bookable_session, summarize
+from apps.cinema.models import Booking, Session
+from apps.cinema.occupancy import get_session_occupancy
+from apps.cinema.services import BOOKING_MODES, BookingConflict, create_booking, session_counters
+
+
+SEEDED_HALL = "Зал 1"  # the hall `seed --halls 1` creates or resizes
+
+
+class LockWaitSampler(threading.Thread):
+    """Samples pg_locks for ungranted locks held up by the load-test backends."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="lock-wait-sampler", daemon=True)
+        self.interval = interval
+        self.pids = set()
+        self.samples = 0
+        self.waiting_samples = 0
+        self.max_waiting = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        try:
+            with connection.cursor() as cursor:
+                while not self._stop_event.wait(self.interval):
+                    pids = list(self.pids)
+                    if not pids:
+                        continue
+                    cursor.execute("SELECT count(DISTINCT pid) FROM pg_locks WHERE NOT granted AND pid = ANY(%s)", [pids])
+                    waiting = cursor.fetchone()[0]
+                    self.samples += 1
+                    self.waiting_samples += waiting
+                    self.max_waiting = max(self.max_waiting, waiting)
+        finally:
+            connection.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def report(self, duration_s: float) -> dict:
+        # Each sample stands for `interval` seconds of every backend it saw waiting.
+        total_ms = self.waiting_samples * self.interval * 1000
+        return {
+            "sample_interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "total_ms": round(total_ms, 1),
+            "avg_waiting_backends": round(self.waiting_samples / self.samples, 3) if self.samples else 0.0,
+            "max_waiting_backends": self.max_waiting,
+        }
+
+
+class Command(BaseCommand):
+    help = ("Fire concurrent create_booking attempts at one session and report throughput, conflict rate, "
+            "latency percentiles and lock-wait time as JSON; --mode compares BOOKING_CONCURRENCY_MODEs.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--session", type=int, help="Session id (default: first bookable session)")
+        parser.add_argument("--seed", action="store_true", help="Run `seed --open --halls 1` first and use its first session")
+        parser.add_argument("--rows", type=int, default=10, help="Rows per hall for --seed (default: 10)")
+        parser.add_argument("--seats", type=int, default=12, help="Seats per row for --seed (default: 12)")
+        parser.add_argument("--threads", type=int, default=32, help="Concurrent clients (default: 32)")
+        parser.add_argument("--attempts", type=int, default=500, help="Total booking attempts (default: 500)")
+        parser.add_argument("--seats-per-booking", type=int, default=2, help="Seats per attempt (default: 2)")
+        parser.add_argument("--hot-seats", type=int, default=0, help="Only pick from the first N seats to force contention (default: all)")
+        parser.add_argument("--lock-sample-ms", type=float, default=5.0, help="pg_locks sampling period (default: 5)")
+        parser.add_argument("--random-seed", type=int, default=1, help="RNG seed for seat selection")
+        parser.add_argument("--mode", action="append", choices=BOOKING_MODES,
+                            help="BOOKING_CONCURRENCY_MODE to run with; repeat to compare modes (default: the setting)")
+        parser.add_argument("--keep", action="store_true", help="Keep the bookings created by the run")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+
+    def handle(self, *args, **opts):
+        if opts["seed"]:
+            call_command("seed", "--open", "--halls", "1", "--days", "1",
+                         "--rows", str(opts["rows"]), "--seats", str(opts["seats"]), stdout=self.stderr)
+        # With --seed: the first session of the hall just (re)seeded, not of any hall
+        session = bookable_session(opts["session"], hall_name=SEEDED_HALL if opts["seed"] else None)
+        if session is None:
+            raise CommandError("Нет подходящего сеанса. Запустите с --seed или `python manage.py seed --open`.")
+        occ = get_session_occupancy(session)
+        free = [(s["row"], s["seat"]) for s in occ.layout.seat_map() if not occ.is_occupied(s["row"], s["seat"])]
+        if opts["hot_seats"]:
+            free = free[:opts["hot_seats"]]
+        if len(free) < opts["seats_per_booking"]:
+            raise CommandError(f"В сеансе {session.pk} недостаточно свободных мест.")
+
+        modes = opts["mode"] or [settings.BOOKING_CONCURRENCY_MODE]
+        if opts["keep"] and len(modes) > 1:
+            raise CommandError("--keep работает только с одним --mode.")
+
+        runs = []
+        for mode in modes:
+            with override_settings(BOOKING_CONCURRENCY_MODE=mode):
+                runs.append(self._run(session, free, opts))
+        report = runs[0] if len(runs) == 1 else {"runs": runs}
+
+        body = json.dumps(report, indent=2)
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as f:
+                f.write(body + "\n")
+            self.stderr.write(f"Report written to {opts['output']}")
+        else:
+            self.stdout.write(body)
+
+    def _run(self, session, free, opts) -> dict:
+        lock = threading.Lock()
+        remaining = [opts["attempts"]]
+        outcomes = Counter()
+        latencies = {"ok": [], "conflict": [], "error": []}
+        booking_ids = []
+        sampler = LockWaitSampler(opts["lock_sample_ms"] / 1000)
+
+        def worker(idx: int):
+            rng = random.Random(opts["random_seed"] * 1000 + idx)
+            try:
+                with connections["default"].cursor() as cursor:
+                    cursor.execute("SELECT pg_backend_pid()")
+                    sampler.pids.add(cursor.fetchone()[0])
+                while True:
+                    with lock:
+                        if remaining[0] <= 0:
+                            return
+                        remaining[0] -= 1
+                    seats = rng.sample(free, opts["seats_per_booking"])
+                    started = time.perf_counter()
+                    try:
+                        booking = create_booking(
+                            session_id=session.pk,
+                            customer_name="loadtest",
+                            customer_email="loadtest@example.com",
+                            customer_phone=None,
+                            seats=seats,
+                        )
+                        outcome = "ok"
+                    except (BookingConflict, Http404, ValueError):
+                        booking, outcome = None, "conflict"
+                    except Exception:
+                        booking, outcome = None, "error"
+                    elapsed = (time.perf_counter() - started) * 1000
+                    with lock:
+                        outcomes[outcome] += 1
+                        latencies[outcome].append(elapsed)
+                        if booking is not None:
+                            booking_ids.append(booking.pk)
+            finally:
+                connections["default"].close()
+
+        threads = [threading.Thread(target=worker, args=(i,), name=f"loadtest-{i}") for i in range(opts["threads"])]
+        sampler.start()
+        started_at = timezone.now()
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duration = time.perf_counter() - t0
+        sampler.stop()
+
+        attempts = sum(outcomes.values())
+        report = {
+            "started_at": started_at.isoformat(),
+            "config": {
+                "session": session.pk,
+                "mode": settings.BOOKING_CONCURRENCY_MODE,
+                "threads": opts["threads"],
+                "attempts": opts["attempts"],
+                "seats_per_booking": opts["seats_per_booking"],
+                "candidate_seats": len(free),
+                "random_seed": opts["random_seed"],
+            },
+            "duration_s": round(duration, 3),
+            "attempts": attempts,
+            "succeeded": outcomes["ok"],
+            "conflicts": outcomes["conflict"],
+            "errors": outcomes["error"],
+            "conflict_rate": round(outcomes["conflict"] / attempts, 4) if attempts else 0.0,
+            "throughput_rps": round(attempts / duration, 2) if duration else 0.0,
+            "bookings_per_s": round(outcomes["ok"] / duration, 2) if duration else 0.0,
+            "latency_ms": summarize(latencies["ok"] + latencies["conflict"] + latencies["error"]),
+            "latency_ms_by_outcome": {k: summarize(v) for k, v in latencies.items()},
+            "lock_wait": sampler.report(duration),
+        }
+
+        if not opts["keep"] and booking_ids:
+            self._cleanup(session, booking_ids)
+        return report
+
+    def _cleanup(self, session, booking_ids):
+        Booking.objects.filter(pk__in=booking_ids).delete()
+        Session.objects.filter(pk=session.pk).update(occupancy_version=F("occupancy_version") + 1, **session_counters())
+        reports.mark_changed(timezone.localdate(session.starts_at))
@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from apps.cinema import idempotency
+
+
+class Command(BaseCommand):
+    help = "Delete Idempotency-Key records older than BOOKING_IDEMPOTENCY_TTL_HOURS (run from cron)."
+
+    def handle(self, *args, **opts):
+        self.stdout.write(self.style.SUCCESS(f"Keys deleted: {idempotency.purge()}"))
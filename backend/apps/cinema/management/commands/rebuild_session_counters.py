@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from apps.cinema.models import Hall, Session
+from apps.cinema.occupancy import hall_capacity
+from apps.cinema.services import session_counters
+
+
+class Command(BaseCommand):
+    help = ("Recount Session.sold_count/revenue from tickets and Hall.capacity from seats "
+            "with set-based UPDATEs; only rows that drifted are written.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--session", type=int, action="append", help="Only these session ids (repeatable)")
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many rows are off")
+
+    @transaction.atomic
+    def handle(self, *args, **opts):
+        counters = session_counters()
+        sessions = Session.objects.all()
+        if opts["session"]:
+            sessions = sessions.filter(pk__in=opts["session"])
+        sessions = (sessions
+            .annotate(real_sold=counters["sold_count"], real_revenue=counters["revenue"])
+            .exclude(sold_count=F("real_sold"), revenue=F("real_revenue")))
+
+        halls = Hall.objects.annotate(real_capacity=hall_capacity()).exclude(capacity=F("real_capacity"))
+        if opts["session"]:
+            halls = halls.filter(sessions__pk__in=opts["session"]).distinct()
+
+        if opts["dry_run"]:
+            self.stdout.write(f"Sessions off: {sessions.count()}, halls off: {halls.count()}")
+            return
+        fixed_sessions = sessions.update(**counters)
+        fixed_halls = halls.update(capacity=hall_capacity())
+        self.stdout.write(self.style.SUCCESS(f"Sessions fixed: {fixed_sessions}, halls fixed: {fixed_halls}"))
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.cinema import reports
+
+
+class Command(BaseCommand):
+    help = ("Rebuild the sales summaries: days with pending changes by default, "
+            "or every day in --from/--to (after data fixes or moved sessions).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="YYYY-MM-DD")
+
+    def handle(self, *args, **opts):
+        date_from, date_to = opts["date_from"], opts["date_to"]
+        if (date_from is None) != (date_to is None):
+            raise CommandError("--from and --to go together")
+        days = None
+        if date_from is not None:
+            if date_to < date_from:
+                raise CommandError("--to is before --from")
+            days = [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+
+        rebuilt = reports.refresh(days)
+        self.stdout.write(self.style.SUCCESS(f"Days rebuilt: {len(rebuilt)}"))
@@ -5,7 +5,8 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.db import transaction
 
-from apps.cinema.models import Hall, Seat, SeatType, HallPrice, Movie, Session
+from apps.cinema.models import Hall, SeatType, HallPrice, Movie, Session
+from apps.cinema.services import regenerate_seat_grid
 
 class Command(BaseCommand):
     help = "Create demo data: halls, seats (VIP/standard), prices, movies, sessions."
@@ -57,25 +58,14 @@ class Command(BaseCommand):
 
             created_halls.append(hall)
 
-            # Resize seat grid
-            Seat.objects.filter(hall=hall, row__gt=hall.rows_count).delete()
-            Seat.objects.filter(hall=hall, number__gt=hall.seats_per_row).delete()
+            # Resize seat grid, last 2 rows are VIP
+            regenerate_seat_grid(hall, layout=[{"seat_type": SeatType.VIP, "last_rows": 2}])
 
-            existing = set(Seat.objects.filter(hall=hall).values_list("row", "number"))
-            to_create = []
-            for r in range(1, hall.rows_count + 1):
-                for n in range(1, hall.seats_per_row + 1):
-                    if (r, n) in existing:
-                        continue
-                    st = SeatType.VIP if r >= hall.rows_count - 1 else SeatType.STANDARD
-                    to_create.append(Seat(hall=hall, row=r, number=n, seat_type=st))
-            if to_create:
-                Seat.objects.bulk_create(to_create)
-
-            HallPrice.objects.get_or_create(
-                hall=hall,
-                defaults={"standard_price": 250, "vip_price": 350}
-            )
+            # Created empty with the hall; keep prices an admin already set
+            prices, _ = HallPrice.objects.get_or_create(hall=hall)
+            if not prices.standard_price and not prices.vip_price:
+                prices.standard_price, prices.vip_price = 250, 350
+                prices.save()
 
         today = timezone.localdate()
         Session.objects.filter(starts_at__date__gte=today, hall__in=created_halls).delete()
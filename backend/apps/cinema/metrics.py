@@ -0,0 +1,182 @@
+"""In-process request metrics.
+
+``RequestMetricsMiddleware`` feeds one ``RequestSample`` per sampled request
+into ``registry``, which keeps per-view counters and a fixed-bucket latency
+histogram. Numbers are per worker process; scrape every worker (or put the
+workers behind one and accept the sample) to get the full picture.
+
+The request being measured is ``current_timer``, a context variable, so
+queries and serialization running in ``sync_to_async`` threads of an async
+view are charged to it as well.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+# Upper bounds of the latency buckets in milliseconds; the last bucket is open.
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+@dataclass
+class RequestSample:
+    view: str
+    method: str
+    status: int
+    queries: int
+    db_ms: float
+    serialize_ms: float
+    render_ms: float
+    total_ms: float
+
+
+class RequestTimer:
+    """Counters of one sampled request, shared by every thread working on it."""
+
+    __slots__ = ("queries", "db_seconds", "serialize_seconds", "_lock")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add_query(self, seconds: float) -> None:
+        with self._lock:
+            self.queries += 1
+            self.db_seconds += seconds
+
+    def add_serialize(self, seconds: float) -> None:
+        with self._lock:
+            self.serialize_seconds += seconds
+
+
+current_timer: ContextVar[Optional[RequestTimer]] = ContextVar("request_metrics_timer", default=None)
+_serializing: ContextVar[bool] = ContextVar("request_metrics_serializing", default=False)
+
+
+@contextmanager
+def serializing():
+    """Charge the enclosed block to the current request's serialization time.
+
+    Queries issued inside (lazy querysets, prefetches) stay DB time. Nested
+    blocks are counted once, by the outermost one.
+    """
+    timer = current_timer.get()
+    if timer is None or _serializing.get():
+        yield
+        return
+    token = _serializing.set(True)
+    db_before = timer.db_seconds
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        timer.add_serialize(max(elapsed - (timer.db_seconds - db_before), 0.0))
+        _serializing.reset(token)
+
+
+class TimedRepresentationMixin:
+    """Mixed into the project's output serializers: ``to_representation`` counts as serialization.
+
+    Nested project serializers are counted once (see ``serializing``); with
+    no request being measured this is one context variable lookup.
+    """
+
+    def to_representation(self, instance):
+        if current_timer.get() is None:
+            return super().to_representation(instance)
+        with serializing():
+            return super().to_representation(instance)
+
+
+class ViewStats:
+    __slots__ = ("count", "errors", "queries", "max_queries", "db_ms", "serialize_ms", "render_ms", "total_ms",
+                 "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_ms = 0.0
+        self.serialize_ms = 0.0
+        self.render_ms = 0.0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, sample: RequestSample) -> None:
+        self.count += 1
+        self.errors += sample.status >= 500
+        self.queries += sample.queries
+        self.max_queries = max(self.max_queries, sample.queries)
+        self.db_ms += sample.db_ms
+        self.serialize_ms += sample.serialize_ms
+        self.render_ms += sample.render_ms
+        self.total_ms += sample.total_ms
+        self.max_ms = max(self.max_ms, sample.total_ms)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, sample.total_ms)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (max for the open bucket)."""
+        rank = q * self.count
+        seen = 0
+        for idx, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return float(BUCKETS_MS[idx]) if idx < len(BUCKETS_MS) else round(self.max_ms, 3)
+        return 0.0
+
+    def as_dict(self) -> dict:
+        n = self.count or 1
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "queries_avg": round(self.queries / n, 2),
+            "queries_max": self.max_queries,
+            "db_ms_avg": round(self.db_ms / n, 3),
+            "serialize_ms_avg": round(self.serialize_ms / n, 3),
+            "render_ms_avg": round(self.render_ms / n, 3),
+            "total_ms_avg": round(self.total_ms / n, 3),
+            "total_ms_max": round(self.max_ms, 3),
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "histogram": {
+                **{f"le_{b}": c for b, c in zip(BUCKETS_MS, self.buckets)},
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views: Dict[str, ViewStats] = {}
+
+    def record(self, sample: RequestSample) -> None:
+        key = f"{sample.method} {sample.view}"
+        with self._lock:
+            stats = self._views.get(key)
+            if stats is None:
+                stats = self._views[key] = ViewStats()
+            stats.add(sample)
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            rows = [{"view": key, **stats.as_dict()} for key, stats in self._views.items()]
+        return sorted(rows, key=lambda r: r["count"] * r["total_ms_avg"], reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._views.clear()
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .metrics import RequestSample, RequestTimer, current_timer, registry
+
+
+def _record_query(execute, sql, params, many, context):
+    """``execute_wrapper`` hook on every connection; reports to the request being measured."""
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.add_query(time.perf_counter() - started)
+
+
+def _install_query_hook(sender=None, connection=None, **kwargs):
+    # Connections are per thread, so sync_to_async threads get the hook too.
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class RequestMetricsMiddleware:
+    """Per-view query count, DB time, serialization time, render time and total latency.
+
+    Enabled by REQUEST_METRICS_SAMPLE_RATE > 0; a sampled request gets a
+    Server-Timing header and is added to ``metrics.registry``. For streaming
+    responses only the time until the first byte is measured. Works in both
+    sync and async chains, so async views stay async under ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_METRICS_SAMPLE_RATE
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        self.server_timing = settings.REQUEST_METRICS_SERVER_TIMING
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+        connection_created.connect(_install_query_hook, dispatch_uid="request_metrics_queries")
+        for conn in connections.all(initialized_only=True):
+            _install_query_hook(connection=conn)
+
+    def _sampled(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        timer = RequestTimer()
+        request._metrics_render = [0.0, 0.0]
+        started = time.perf_counter()
+        token = current_timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self._finish(request, response, timer, started)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        timer = RequestTimer()
+        request._metrics_render = [0.0, 0.0]
+        started = time.perf_counter()
+        token = current_timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self._finish(request, response, timer, started)
+
+    def _finish(self, request, response, timer: RequestTimer, started: float):
+        total_ms = (time.perf_counter() - started) * 1000
+        render_started, render_finished = request._metrics_render
+        render_ms = (render_finished - render_started) * 1000 if render_finished else 0.0
+        db_ms = timer.db_seconds * 1000
+        serialize_ms = timer.serialize_seconds * 1000
+        match = request.resolver_match
+        registry.record(RequestSample(
+            view=(match.route or match.view_name) if match else "<unresolved>",
+            method=request.method,
+            status=response.status_code,
+            queries=timer.queries,
+            db_ms=db_ms,
+            serialize_ms=serialize_ms,
+            render_ms=render_ms,
+            total_ms=total_ms,
+        ))
+        if self.server_timing:
+            response["Server-Timing"] = (
+                f'db;dur={db_ms:.2f};desc="{timer.queries} queries", '
+                f"serialize;dur={serialize_ms:.2f}, "
+                f"render;dur={render_ms:.2f}, "
+                f"app;dur={max(total_ms - db_ms - serialize_ms - render_ms, 0.0):.2f}, "
+                f"total;dur={total_ms:.2f}"
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns.
+        marks = getattr(request, "_metrics_render", None)
+        if marks is not None:
+            marks[0] = time.perf_counter()
+
+            def finished(rendered):
+                marks[1] = time.perf_counter()
+
+            response.add_post_render_callback(finished)
+        return response
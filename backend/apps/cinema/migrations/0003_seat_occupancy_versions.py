@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinema', '0002_remove_disabled_seat_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hall',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='occupancy_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
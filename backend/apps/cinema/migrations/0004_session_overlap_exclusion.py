@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:46
+
+import apps.cinema.models
+import django.contrib.postgres.constraints
+from django.contrib.postgres.operations import BtreeGistExtension
+import django.contrib.postgres.fields.ranges
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinema', '0003_seat_occupancy_versions'),
+    ]
+
+    operations = [
+        # GiST по hall_id (операция =) требует btree_gist
+        BtreeGistExtension(),
+        migrations.AddConstraint(
+            model_name='session',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(expressions=[(apps.cinema.models.TsTzRange('starts_at', 'ends_at', django.contrib.postgres.fields.ranges.RangeBoundary()), '&&'), ('hall', '=')], name='excl_session_overlap_in_hall', violation_error_message='Сеанс пересекается с другим сеансом в этом зале.'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+def create_missing_prices(apps, schema_editor):
+    Hall = apps.get_model("cinema", "Hall")
+    HallPrice = apps.get_model("cinema", "HallPrice")
+    HallPrice.objects.bulk_create(
+        HallPrice(hall_id=hall_id)
+        for hall_id in Hall.objects.filter(prices__isnull=True).values_list("id", flat=True)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinema', '0005_booking_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_prices, migrations.RunPython.noop),
+    ]
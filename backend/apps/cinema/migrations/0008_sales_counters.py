@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:02
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Hall = apps.get_model("cinema", "Hall")
+    Seat = apps.get_model("cinema", "Seat")
+    Session = apps.get_model("cinema", "Session")
+    Ticket = apps.get_model("cinema", "Ticket")
+    seats = Seat.objects.filter(hall_id=OuterRef("pk")).order_by().values("hall_id")
+    Hall.objects.update(capacity=Coalesce(Subquery(seats.annotate(n=Count("id")).values("n")), 0))
+    tickets = Ticket.objects.filter(session_id=OuterRef("pk")).order_by().values("session_id")
+    Session.objects.update(
+        sold_count=Coalesce(Subquery(tickets.annotate(n=Count("id")).values("n")), 0),
+        revenue=Coalesce(Subquery(tickets.annotate(s=Sum("price_snapshot")).values("s")), Value(Decimal("0.00")),
+                         output_field=models.DecimalField(max_digits=12, decimal_places=2)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinema', '0007_ticket_admitted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hall',
+            name='capacity',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='revenue',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='sold_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinema', '0008_sales_counters'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='ticket',
+            name='uniq_ticket_seat_in_session',
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='cancelled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='ticket',
+            constraint=models.UniqueConstraint(condition=models.Q(('cancelled_at__isnull', True)), fields=('session', 'seat'), name='uniq_ticket_seat_in_session'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def mark_sold_days(apps, schema_editor):
+    # The first refresh then builds the summaries for all past sales.
+    Session = apps.get_model("cinema", "Session")
+    ReportChange = apps.get_model("cinema", "ReportChange")
+    days = (Session.objects.filter(tickets__isnull=False)
+            .annotate(day=TruncDate("starts_at")).order_by().values_list("day", flat=True).distinct())
+    ReportChange.objects.bulk_create(ReportChange(day=day) for day in days)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinema', '0009_ticket_cancellation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SalesSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('seat_type', models.CharField(choices=[('STANDARD', 'Обычное'), ('VIP', 'VIP')], max_length=16)),
+                ('tickets', models.PositiveIntegerField()),
+                ('revenue', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('hall', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='cinema.hall')),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='cinema.movie')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'movie', 'hall', 'seat_type'), name='uniq_sales_summary_group')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SeatSalesSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('row', models.PositiveIntegerField()),
+                ('number', models.PositiveIntegerField()),
+                ('tickets', models.PositiveIntegerField()),
+                ('hall', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='cinema.hall')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hall', 'day'], name='cinema_seat_hall_id_966b33_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'hall', 'row', 'number'), name='uniq_seat_sales_summary_seat')],
+            },
+        ),
+        migrations.RunPython(mark_sold_days, migrations.RunPython.noop),
+    ]
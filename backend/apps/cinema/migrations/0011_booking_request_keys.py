@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinema', '0010_report_summaries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingRequestKey',
+            fields=[
+                ('key', models.CharField(max_length=128, primary_key=True, serialize=False)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('booking', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='cinema.booking')),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:16
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinema', '0011_booking_request_keys'),
+    ]
+
+    operations = [
+        # gin_trgm_ops и операторы % / <% требуют pg_trgm
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='movie',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='movie_title_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('title', 'description', config='russian'), name='movie_search_vector'),
+        ),
+    ]
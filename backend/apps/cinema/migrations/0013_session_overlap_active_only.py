@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:25
+
+import apps.cinema.models
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinema', '0012_movie_search'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='session',
+            name='excl_session_overlap_in_hall',
+        ),
+        migrations.AddConstraint(
+            model_name='session',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status', 'ACTIVE')), expressions=[(apps.cinema.models.TsTzRange('starts_at', 'ends_at', django.contrib.postgres.fields.ranges.RangeBoundary()), '&&'), ('hall', '=')], name='excl_session_overlap_in_hall', violation_error_message='Сеанс пересекается с другим сеансом в этом зале.'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cinema', '0014_cache_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeldSeat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(db_index=True, max_length=32)),
+                ('row', models.PositiveIntegerField()),
+                ('number', models.PositiveIntegerField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='cinema.session')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('session', 'row', 'number'), name='uniq_held_seat')],
+            },
+        ),
+    ]
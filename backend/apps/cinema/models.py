@@ -2,15 +2,41 @@ from __future__ import annotations
 
 import uuid
 from decimal import Decimal
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeBoundary, RangeOperators
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
-class Hall(models.Model):
+class CounterFieldsMixin:
+    """Поля из COUNTER_FIELDS меняются только F()-обновлениями в сервисах.
+
+    Обычный save() существующей строки их не пишет, иначе устаревшие значения
+    из памяти затрут параллельные обновления. Явный update_fields пишет ровно
+    перечисленное.
+    """
+    COUNTER_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+class Hall(CounterFieldsMixin, models.Model):
     name = models.CharField(max_length=128, unique=True)
     rows_count = models.PositiveIntegerField()
     seats_per_row = models.PositiveIntegerField()
     is_active = models.BooleanField(default=False)  # "Открыть продажу билетов"
+    version = models.PositiveIntegerField(default=0, editable=False)  # растёт при изменении сетки мест
+    capacity = models.PositiveIntegerField(default=0, editable=False)  # число мест, обновляется вместе с version
+
+    # Меняются только через occupancy.bump_hall_version (F()-обновление)
+    COUNTER_FIELDS = ("version", "capacity")
 
     def clean(self):
         if self.rows_count < 1 or self.seats_per_row < 1:
@@ -56,6 +82,9 @@ class HallPrice(models.Model):
         if self.standard_price < 0 or self.vip_price < 0:
             raise ValidationError("Цена не может быть отрицательной.")
 
+# Выражение должно совпадать с индексом movie_search_vector, иначе индекс не используется
+MOVIE_SEARCH_VECTOR = SearchVector("title", "description", config="russian")
+
 class Movie(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
@@ -63,6 +92,13 @@ class Movie(models.Model):
     poster_url = models.URLField(blank=True)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Нечёткий поиск по названию (pg_trgm) и полнотекстовый по названию и описанию, см. catalog.py
+            GinIndex(fields=["title"], opclasses=["gin_trgm_ops"], name="movie_title_trgm"),
+            GinIndex(MOVIE_SEARCH_VECTOR, name="movie_search_vector"),
+        ]
+
     def clean(self):
         if self.duration_minutes < 1:
             raise ValidationError("Длительность должна быть больше 0.")
@@ -70,31 +106,52 @@ class Movie(models.Model):
     def __str__(self) -> str:
         return self.title
 
+class TsTzRange(models.Func):
+    function = "TSTZRANGE"
+    output_field = DateTimeRangeField()
+
+SESSION_OVERLAP_CONSTRAINT = "excl_session_overlap_in_hall"
+
 class SessionStatus(models.TextChoices):
     ACTIVE = "ACTIVE", "Активен"
     CANCELLED = "CANCELLED", "Отменён"
 
-class Session(models.Model):
+class Session(CounterFieldsMixin, models.Model):
     hall = models.ForeignKey(Hall, on_delete=models.PROTECT, related_name="sessions")
     movie = models.ForeignKey(Movie, on_delete=models.PROTECT, related_name="sessions")
     starts_at = models.DateTimeField()
     ends_at = models.DateTimeField()
     status = models.CharField(max_length=16, choices=SessionStatus.choices, default=SessionStatus.ACTIVE)
+    occupancy_version = models.PositiveIntegerField(default=0, editable=False)  # растёт при каждой продаже
+    # Счётчики продаж, меняются в той же транзакции, что и билеты
+    sold_count = models.PositiveIntegerField(default=0, editable=False)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"), editable=False)
+
+    # Меняются только F()-обновлениями: продажа, отмена, rebuild_session_counters
+    COUNTER_FIELDS = ("occupancy_version", "sold_count", "revenue")
 
     class Meta:
         indexes = [
             models.Index(fields=["hall", "starts_at"]),
             models.Index(fields=["starts_at"]),
         ]
+        constraints = [
+            # Пересечение сеансов в одном зале запрещено на уровне БД (GiST, полуоткрытый интервал)
+            ExclusionConstraint(
+                name=SESSION_OVERLAP_CONSTRAINT,
+                expressions=[
+                    (TsTzRange("starts_at", "ends_at", RangeBoundary()), RangeOperators.OVERLAPS),
+                    ("hall", RangeOperators.EQUAL),
+                ],
+                # Отменённый сеанс не занимает зал: на его время можно поставить замену
+                condition=models.Q(status=SessionStatus.ACTIVE),
+                violation_error_message="Сеанс пересекается с другим сеансом в этом зале.",
+            ),
+        ]
 
     def clean(self):
         if self.ends_at <= self.starts_at:
             raise ValidationError("Окончание сеанса должно быть позже начала.")
-        # Проверка пересечения сеансов в одном зале
-        qs = Session.objects.filter(hall=self.hall).exclude(pk=self.pk)
-        overlap = qs.filter(starts_at__lt=self.ends_at, ends_at__gt=self.starts_at)
-        if overlap.exists():
-            raise ValidationError("Сеанс пересекается с другим сеансом в этом зале.")
 
     def __str__(self) -> str:
         return f"{self.movie.title} @ {self.hall.name} {self.starts_at:%Y-%m-%d %H:%M}"
@@ -111,6 +168,12 @@ class Booking(models.Model):
     status = models.CharField(max_length=16, choices=BookingStatus.choices, default=BookingStatus.CONFIRMED)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # keyset-пагинация админского списка броней
+            models.Index(fields=["created_at", "id"]),
+        ]
+
     def clean(self):
         if not (self.customer_email or self.customer_phone):
             raise ValidationError("Укажите email или телефон.")
@@ -124,10 +187,13 @@ class Ticket(models.Model):
     seat_type_snapshot = models.CharField(max_length=16, choices=SeatType.choices)
     price_snapshot = models.DecimalField(max_digits=10, decimal_places=2)
     code = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    admitted_at = models.DateTimeField(null=True, blank=True)  # проход по билету на входе
+    cancelled_at = models.DateTimeField(null=True, blank=True)  # отменённый билет больше не занимает место
 
     class Meta:
         constraints = [
-            models.UniqueConstraint(fields=["session", "seat"], name="uniq_ticket_seat_in_session"),
+            models.UniqueConstraint(fields=["session", "seat"], condition=models.Q(cancelled_at__isnull=True),
+                                    name="uniq_ticket_seat_in_session"),
         ]
         indexes = [
             models.Index(fields=["session"]),
@@ -136,3 +202,71 @@ class Ticket(models.Model):
 
     def __str__(self) -> str:
         return f"Ticket {self.code} ({self.session_id})"
+
+# --------- Отчёты: сводные таблицы, пересчитываются по «грязным» дням (см. reports.py) ---------
+class SalesSummary(models.Model):
+    day = models.DateField()  # локальная дата начала сеанса
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name="+")
+    hall = models.ForeignKey(Hall, on_delete=models.CASCADE, related_name="+")
+    seat_type = models.CharField(max_length=16, choices=SeatType.choices)
+    tickets = models.PositiveIntegerField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "movie", "hall", "seat_type"], name="uniq_sales_summary_group"),
+        ]
+
+class SeatSalesSummary(models.Model):
+    day = models.DateField()
+    hall = models.ForeignKey(Hall, on_delete=models.CASCADE, related_name="+")
+    row = models.PositiveIntegerField()
+    number = models.PositiveIntegerField()
+    tickets = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "hall", "row", "number"], name="uniq_seat_sales_summary_seat"),
+        ]
+        indexes = [
+            models.Index(fields=["hall", "day"]),
+        ]
+
+class ReportChange(models.Model):
+    """A sale or cancellation on ``day`` not yet folded into the summaries.
+
+    Append-only so writers never wait on each other; see reports.refresh().
+    """
+    day = models.DateField()
+
+# --------- Идемпотентность публичной брони (заголовок Idempotency-Key, см. idempotency.py) ---------
+class BookingRequestKey(models.Model):
+    key = models.CharField(max_length=128, primary_key=True)
+    fingerprint = models.CharField(max_length=64)  # sha256 тела запроса и сеанса
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, null=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+# --------- Версии кешей ответов (см. caches.py) ---------
+class CacheVersion(models.Model):
+    """Version token of a cached response family, shared by all workers.
+
+    Rendered entries stay in the process cache; their keys include these
+    tokens, so a bump from any worker makes every worker re-render.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    version = models.BigIntegerField()
+
+# --------- Временные брони мест (DatabaseHoldStore, см. holds.py) ---------
+class HeldSeat(models.Model):
+    """One seat of a hold; the rows of a hold share its token and expiry."""
+    token = models.CharField(max_length=32, db_index=True)
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name="+")
+    row = models.PositiveIntegerField()
+    number = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            # Место держит не больше одной брони; истёкшие строки удаляются перед новой бронью
+            models.UniqueConstraint(fields=["session", "row", "number"], name="uniq_held_seat"),
+        ]
@@ -0,0 +1,260 @@
+"""Process-local seat availability engine.
+
+A hall's seat grid is kept as a static layout (one byte per cell holding the
+seat type) and every session gets a packed occupancy bitmap indexed by the same
+(row, number) cells. Both are built from the database once and then kept in
+step incrementally: ``create_booking`` marks the booked cells after commit and
+cancellations clear them.
+
+Hall prices are cached next to the layout under the same ``Hall.version``;
+seat writes, grid regeneration and price updates all bump it.
+
+``Hall.version`` and ``Session.occupancy_version`` are bumped in the database
+by every writer, so a worker whose copy fell behind (another process sold the
+seats) notices it from the session row it loads anyway and rebuilds.
+"""
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Iterable, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Hall, HallPrice, Seat, SeatType, Ticket
+
+NO_SEAT = 0
+_TYPE_CODES = {SeatType.STANDARD: 1, SeatType.VIP: 2}
+_CODE_TYPES = {code: str(t) for t, code in _TYPE_CODES.items()}
+
+
+def type_code(seat_type: str) -> int:
+    """Cell value of ``seat_type`` in ``HallLayout.cells``."""
+    return _TYPE_CODES[seat_type]
+
+
+_lock = threading.Lock()
+_deferred = threading.local()
+_layouts: dict[int, "HallLayout"] = {}
+_sessions: dict[int, "SessionOccupancy"] = {}
+_prices: dict[int, Tuple[int, HallPrice]] = {}
+
+
+class HallLayout:
+    """Seat-type grid of a hall, row-major, one byte per (row, number) cell."""
+
+    __slots__ = ("hall_id", "version", "rows", "width", "cells", "seats_count", "_seat_map")
+
+    def __init__(self, hall_id: int, version: int, seats: Iterable[Tuple[int, int, str]]):
+        seats = list(seats)
+        self.hall_id = hall_id
+        self.version = version
+        self.rows = max((r for r, _, _ in seats), default=0)
+        self.width = max((n for _, n, _ in seats), default=0)
+        self.cells = bytearray(self.rows * self.width)
+        for r, n, seat_type in seats:
+            self.cells[(r - 1) * self.width + n - 1] = _TYPE_CODES.get(seat_type, _TYPE_CODES[SeatType.STANDARD])
+        self.seats_count = len(seats)
+        self._seat_map = None
+
+    def index(self, row: int, number: int) -> Optional[int]:
+        if 1 <= row <= self.rows and 1 <= number <= self.width:
+            idx = (row - 1) * self.width + number - 1
+            if self.cells[idx] != NO_SEAT:
+                return idx
+        return None
+
+    def seat_type(self, row: int, number: int) -> Optional[str]:
+        idx = self.index(row, number)
+        return None if idx is None else _CODE_TYPES[self.cells[idx]]
+
+    def seat_map(self) -> List[dict]:
+        # The layout never changes in place, so the rendered map is shared.
+        if self._seat_map is None:
+            self._seat_map = [
+                {"row": idx // self.width + 1, "seat": idx % self.width + 1, "type": _CODE_TYPES[code]}
+                for idx, code in enumerate(self.cells) if code != NO_SEAT
+            ]
+        return self._seat_map
+
+
+class SessionOccupancy:
+    """Packed bitmap of sold seats of a session over its hall layout."""
+
+    __slots__ = ("session_id", "version", "layout", "bits")
+
+    def __init__(self, session_id: int, version: int, layout: HallLayout):
+        self.session_id = session_id
+        self.version = version
+        self.layout = layout
+        self.bits = bytearray((len(layout.cells) + 7) // 8)
+
+    def set(self, row: int, number: int) -> bool:
+        idx = self.layout.index(row, number)
+        if idx is None:
+            return False
+        self.bits[idx >> 3] |= 1 << (idx & 7)
+        return True
+
+    def clear(self, row: int, number: int) -> bool:
+        idx = self.layout.index(row, number)
+        if idx is None:
+            return False
+        self.bits[idx >> 3] &= ~(1 << (idx & 7)) & 0xFF
+        return True
+
+    def is_occupied(self, row: int, number: int) -> bool:
+        idx = self.layout.index(row, number)
+        return idx is not None and bool(self.bits[idx >> 3] & (1 << (idx & 7)))
+
+    def occupied(self) -> List[dict]:
+        width = self.layout.width
+        out = []
+        for byte_idx, byte in enumerate(self.bits):
+            if not byte:
+                continue
+            base = byte_idx << 3
+            for bit in range(8):
+                if byte & (1 << bit):
+                    idx = base + bit
+                    out.append({"row": idx // width + 1, "seat": idx % width + 1})
+        return out
+
+    def count(self) -> int:
+        return sum(bin(b).count("1") for b in self.bits)
+
+
+def get_hall_layout(hall: Hall) -> HallLayout:
+    layout = _layouts.get(hall.pk)
+    if layout is None or layout.version != hall.version:
+        seats = Seat.objects.filter(hall_id=hall.pk).values_list("row", "number", "seat_type")
+        layout = HallLayout(hall.pk, hall.version, seats)
+        with _lock:
+            _layouts[hall.pk] = layout
+    return layout
+
+
+def _cached_prices(hall: Hall) -> Optional[HallPrice]:
+    cached = _prices.get(hall.pk)
+    return cached[1] if cached is not None and cached[0] == hall.version else None
+
+
+def _store_prices(hall: Hall, prices: Optional[HallPrice]) -> HallPrice:
+    if prices is None:
+        # Only halls created before prices were made eagerly; read as free, never written here.
+        prices = HallPrice(hall_id=hall.pk, standard_price=0, vip_price=0)
+    with _lock:
+        _prices[hall.pk] = (hall.version, prices)
+    return prices
+
+
+def get_hall_prices(hall: Hall) -> HallPrice:
+    """Prices of ``hall`` as of its loaded ``version``; shared, don't modify."""
+    prices = _cached_prices(hall)
+    if prices is None:
+        prices = _store_prices(hall, HallPrice.objects.filter(hall_id=hall.pk).first())
+    return prices
+
+
+async def aget_hall_prices(hall: Hall) -> HallPrice:
+    prices = _cached_prices(hall)
+    if prices is None:
+        prices = _store_prices(hall, await HallPrice.objects.filter(hall_id=hall.pk).afirst())
+    return prices
+
+
+def _current_occupancy(session) -> Optional[SessionOccupancy]:
+    occ = _sessions.get(session.pk)
+    if (occ is None or occ.layout is not _layouts.get(session.hall_id)
+            or occ.layout.version != session.hall.version or occ.version < session.occupancy_version):
+        return None
+    return occ
+
+
+def get_session_occupancy(session) -> SessionOccupancy:
+    """Occupancy of ``session`` (loaded with its hall) without rescanning when current."""
+    layout = get_hall_layout(session.hall)
+    occ = _sessions.get(session.pk)
+    if occ is None or occ.layout is not layout or occ.version < session.occupancy_version:
+        occ = SessionOccupancy(session.pk, session.occupancy_version, layout)
+        for row, number in Ticket.objects.filter(session_id=session.pk, cancelled_at__isnull=True).values_list("row_snapshot", "seat_snapshot"):
+            occ.set(row, number)
+        with _lock:
+            _sessions[session.pk] = occ
+    return occ
+
+
+async def aget_session_occupancy(session) -> SessionOccupancy:
+    """``get_session_occupancy`` for async views; only a rebuild leaves the event loop."""
+    occ = _current_occupancy(session)
+    if occ is None:
+        occ = await sync_to_async(get_session_occupancy)(session)
+    return occ
+
+
+def mark_occupied(session_id: int, version: int, seats: Iterable[Tuple[int, int]]) -> None:
+    """Apply a committed booking that moved the session to ``version``."""
+    _apply(session_id, version, seats, SessionOccupancy.set)
+
+
+def mark_released(session_id: int, version: int, seats: Iterable[Tuple[int, int]]) -> None:
+    """Apply a committed cancellation that moved the session to ``version``."""
+    _apply(session_id, version, seats, SessionOccupancy.clear)
+
+
+def _apply(session_id: int, version: int, seats, change) -> None:
+    # If some other change landed in between, the bitmap can't be patched
+    # safely and is dropped so the next read rebuilds it.
+    with _lock:
+        occ = _sessions.get(session_id)
+        if occ is None or occ.version >= version:
+            return
+        if occ.version != version - 1:
+            _sessions.pop(session_id, None)
+            return
+        for row, number in seats:
+            change(occ, row, number)
+        occ.version = version
+
+
+def hall_capacity():
+    """Seat count of the outer hall row, for ``Hall.objects.update(capacity=...)``."""
+    seats = Seat.objects.filter(hall_id=OuterRef("pk")).order_by().values("hall_id").annotate(n=Count("id")).values("n")
+    return Coalesce(Subquery(seats), 0)
+
+
+def bump_hall_version(hall_id: int) -> None:
+    """Invalidate the seat layout and prices of a hall in every process.
+
+    ``Hall.capacity`` is recounted in the same UPDATE.
+    """
+    pending = getattr(_deferred, "halls", None)
+    if pending is not None:
+        pending.add(hall_id)
+        return
+    Hall.objects.filter(pk=hall_id).update(version=F("version") + 1, capacity=hall_capacity())
+    with _lock:
+        _layouts.pop(hall_id, None)
+        _prices.pop(hall_id, None)
+
+
+@contextmanager
+def hall_changes():
+    """Collapse layout invalidations made inside the block into one bump per hall.
+
+    Bulk seat deletes fire ``post_delete`` per seat; without this every seat
+    would cost its own UPDATE of the hall row.
+    """
+    if getattr(_deferred, "halls", None) is not None:
+        yield
+        return
+    _deferred.halls = set()
+    try:
+        yield
+        halls = _deferred.halls
+    finally:
+        _deferred.halls = None
+    for hall_id in halls:
+        bump_hall_version(hall_id)
@@ -0,0 +1,122 @@
+"""Keyset (seek) pagination over (created_at, id), newest first; catalogue pagination.
+
+Unlike offset pagination the cost of a page does not depend on how deep the
+client is, and rows inserted meanwhile never shift pages. Pages are fetched
+as ``.values()`` rows, so the caller serializes them with a ValuesSerializer.
+"""
+from __future__ import annotations
+
+import base64
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(row: dict) -> str:
+    raw = f"{row['created_at']}|{row['id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[object, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit("|", 1)
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            raise ValueError(cursor)
+        return created_at, int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise NotFound("Некорректный курсор.")
+
+
+def after_cursor(queryset, cursor: Optional[Tuple[object, int]]):
+    queryset = queryset.order_by("-created_at", "-id")
+    if cursor is None:
+        return queryset
+    created_at, pk = cursor
+    return queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+
+def iter_keyset(queryset, serialize: Callable[[object], List[dict]], chunk_size: int = 1000) -> Iterator[dict]:
+    """Walk the whole queryset chunk by chunk, holding one chunk in memory."""
+    cursor = None
+    while True:
+        rows = serialize(after_cursor(queryset, cursor)[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        cursor = (parse_datetime(rows[-1]["created_at"]), rows[-1]["id"])
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = 50
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return the page as a lazy queryset with one extra row to detect the next page."""
+        self.request = request
+        self.page_size_used = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        return after_cursor(queryset, decode_cursor(cursor) if cursor else None)[:self.page_size_used + 1]
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_paginated_response(self, data):
+        rows = list(data)
+        has_next = len(rows) > self.page_size_used
+        rows = rows[:self.page_size_used]
+        next_url = None
+        if has_next:
+            url = self.request.build_absolute_uri()
+            next_url = replace_query_param(url, self.cursor_query_param, encode_cursor(rows[-1]))
+        return Response({"next": next_url, "results": rows})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class _CatalogPages(PageNumberPagination):
+    page_size = 24
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class _CatalogCursor(CursorPagination):
+    ordering = ("title", "id")
+    page_size = 24
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class CatalogPagination(BasePagination):
+    """Title-ordered cursor pages by default; numbered pages with ``?page=`` or a search.
+
+    Search results are ordered by relevance, which has no stable seek key, so
+    they always come in numbered pages.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        self.paginator = _CatalogPages() if "page" in params or params.get("q") else _CatalogCursor()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
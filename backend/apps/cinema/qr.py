@@ -0,0 +1,205 @@
+"""Ticket QR codes: rendering, a content-addressed LRU cache and pre-generation.
+
+The QR payload of a ticket only depends on its immutable snapshot fields, so
+the PNG is cached under the SHA-256 of the payload and the digest doubles as a
+strong ETag. A small code -> digest index lets repeat requests skip building
+and hashing the payload; the QR view still reads the ticket row, so a
+cancelled ticket stops being served.
+"""
+from __future__ import annotations
+
+import hashlib
+import multiprocessing
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from io import BytesIO, RawIOBase
+from typing import Iterable, Iterator, Optional, Tuple
+
+import qrcode
+from django.conf import settings
+
+_MAX_CODES = 100_000
+
+
+def qr_payload(code, session_id: int, row: int, seat: int) -> str:
+    # По ТЗ в билете обязательно указывать сеанс, ряд и место.
+    return f"ticket:{code}|session:{session_id}|row:{row}|seat:{seat}"
+
+
+def ticket_qr_payload(ticket) -> str:
+    return qr_payload(ticket.code, ticket.session_id, ticket.row_snapshot, ticket.seat_snapshot)
+
+
+def payload_digest(payload: str) -> str:
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def render_qr_png(payload: str) -> bytes:
+    img = qrcode.make(payload)
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class QrCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._images: "OrderedDict[str, bytes]" = OrderedDict()  # digest -> png
+        self._codes: "OrderedDict[str, str]" = OrderedDict()  # ticket code -> digest
+        self._size = 0
+
+    def get_by_code(self, code) -> Optional[Tuple[str, bytes]]:
+        code = str(code)
+        with self._lock:
+            digest = self._codes.get(code)
+            if digest is None:
+                return None
+            png = self._images.get(digest)
+            if png is None:
+                return None
+            self._codes.move_to_end(code)
+            self._images.move_to_end(digest)
+            return digest, png
+
+    def get_by_digest(self, digest: str) -> Optional[bytes]:
+        with self._lock:
+            png = self._images.get(digest)
+            if png is not None:
+                self._images.move_to_end(digest)
+            return png
+
+    def put(self, code, payload: str) -> Tuple[str, bytes]:
+        """Return the cached PNG for ``payload``, rendering it on a miss."""
+        digest = payload_digest(payload)
+        with self._lock:
+            png = self._images.get(digest)
+            if png is not None:
+                self._images.move_to_end(digest)
+                self._remember(str(code), digest)
+                return digest, png
+        png = render_qr_png(payload)  # outside the lock, rendering is the slow part
+        self.store(code, digest, png)
+        return digest, png
+
+    def store(self, code, digest: str, png: bytes) -> None:
+        with self._lock:
+            if digest not in self._images:
+                self._images[digest] = png
+                self._size += len(png)
+                while self._size > self.max_bytes and len(self._images) > 1:
+                    _, old = self._images.popitem(last=False)
+                    self._size -= len(old)
+            self._remember(str(code), digest)
+
+    def _remember(self, code: str, digest: str) -> None:
+        self._codes[code] = digest
+        self._codes.move_to_end(code)
+        while len(self._codes) > _MAX_CODES:
+            self._codes.popitem(last=False)
+
+
+cache = QrCache(settings.QR_CACHE_MAX_BYTES)
+_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=settings.QR_PREGENERATE_WORKERS, thread_name_prefix="qr-pregenerate")
+        return _pool
+
+
+def pregenerate(tickets: Iterable) -> None:
+    """Render QR codes of freshly sold tickets in the background."""
+    if not settings.QR_PREGENERATE:
+        return
+    pool = _get_pool()
+    for ticket in tickets:
+        pool.submit(cache.put, ticket.code, ticket_qr_payload(ticket))
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is None:
+            # spawn, not fork: the worker has other threads (pools, SSE, DB) running
+            _process_pool = ProcessPoolExecutor(
+                max_workers=settings.QR_EXPORT_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
+
+
+def render_many(tickets: Iterable[Tuple[object, int, int, int]]) -> Iterator[Tuple[Tuple, bytes]]:
+    """Yield ``(ticket, png)`` for (code, session_id, row, seat) tuples as images become ready.
+
+    Cached images are yielded straight away, the rest are rendered in a
+    process pool with a bounded number of jobs in flight, so memory does not
+    grow with the number of tickets.
+    """
+    pool = _get_process_pool()
+    window = settings.QR_EXPORT_WORKERS * 4
+    pending = {}
+    for ticket in tickets:
+        payload = qr_payload(*ticket)
+        digest = payload_digest(payload)
+        png = cache.get_by_digest(digest)
+        if png is not None:
+            yield ticket, png
+            continue
+        pending[pool.submit(render_qr_png, payload)] = (ticket, digest)
+        if len(pending) >= window:
+            yield from _drain(pending)
+    while pending:
+        yield from _drain(pending)
+
+
+def _drain(pending: dict) -> Iterator[Tuple[Tuple, bytes]]:
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        ticket, digest = pending.pop(future)
+        png = future.result()
+        cache.store(ticket[0], digest, png)
+        yield ticket, png
+
+
+class _ChunkWriter(RawIOBase):
+    """Write-only sink that hands buffered bytes back to a generator."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(files: Iterable[Tuple[str, bytes]]) -> Iterator[bytes]:
+    """Stream a ZIP archive of ``(name, data)`` pairs without buffering it whole."""
+    sink = _ChunkWriter()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as zf:
+        for name, data in files:
+            zf.writestr(name, data)  # PNG is already compressed
+            yield sink.pop()
+    yield sink.pop()
+
+
+def stream_tickets_zip(tickets: Iterable[Tuple[object, int, int, int]]) -> Iterator[bytes]:
+    files = (
+        (f"row{row:02d}-seat{seat:02d}-{code}.png", png)
+        for (code, _session_id, row, seat), png in render_many(tickets)
+    )
+    return stream_zip(files)
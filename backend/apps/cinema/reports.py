@@ -0,0 +1,143 @@
+"""Sales reports served from summary tables.
+
+``SalesSummary`` (day x movie x hall x seat type) and ``SeatSalesSummary``
+(day x hall seat) are built from ``Ticket`` snapshots, so a report reads
+O(groups) rows however many tickets were sold. Days are local dates of the
+session start, the same as in the schedule.
+
+Writers only append a ``ReportChange`` row for the session's day inside their
+transaction. ``refresh()`` consumes the rows it can see and rebuilds those
+days; a change that commits meanwhile keeps its row and is picked up by the
+next refresh. Moving a session with sold tickets to another day or hall is
+not tracked, rebuild the range with ``refresh_reports --from/--to``.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterable, List, Optional
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Hall, ReportChange, SalesSummary, SeatSalesSummary, Session, SessionStatus, Ticket
+
+# Serializes refreshes so two of them never rebuild the same day at once.
+_REFRESH_LOCK_KEY = 0x63696E656D61  # "cinema"
+
+SALES_GROUPS = {
+    "day": ("day",),
+    "movie": ("movie_id", "movie__title"),
+    "hall": ("hall_id", "hall__name"),
+    "seat_type": ("seat_type",),
+}
+
+
+def mark_changed(day: date) -> None:
+    ReportChange.objects.create(day=day)
+
+
+def _day_range(day: date):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def rebuild_days(days: Iterable[date]) -> None:
+    """Recompute both summaries for ``days`` from live tickets (call inside a transaction)."""
+    days = sorted(set(days))
+    if not days:
+        return
+    in_days = Q()
+    for day in days:
+        start, end = _day_range(day)
+        in_days |= Q(session__starts_at__gte=start, session__starts_at__lt=end)
+    tickets = (Ticket.objects
+        .filter(in_days, cancelled_at__isnull=True)
+        .annotate(day=TruncDate("session__starts_at"))
+        .order_by())
+
+    SalesSummary.objects.filter(day__in=days).delete()
+    SalesSummary.objects.bulk_create((
+        SalesSummary(day=g["day"], movie_id=g["session__movie_id"], hall_id=g["session__hall_id"],
+                     seat_type=g["seat_type_snapshot"], tickets=g["n"], revenue=g["revenue"])
+        for g in tickets
+            .values("day", "session__movie_id", "session__hall_id", "seat_type_snapshot")
+            .annotate(n=Count("id"), revenue=Sum("price_snapshot"))
+    ), batch_size=1000)
+
+    SeatSalesSummary.objects.filter(day__in=days).delete()
+    SeatSalesSummary.objects.bulk_create((
+        SeatSalesSummary(day=g["day"], hall_id=g["session__hall_id"], row=g["row_snapshot"],
+                         number=g["seat_snapshot"], tickets=g["n"])
+        for g in tickets
+            .values("day", "session__hall_id", "row_snapshot", "seat_snapshot")
+            .annotate(n=Count("id"))
+    ), batch_size=1000)
+
+
+@transaction.atomic
+def refresh(days: Optional[Iterable[date]] = None) -> List[date]:
+    """Rebuild the days with pending changes (or exactly ``days``); returns the rebuilt days."""
+    if days is None and not ReportChange.objects.exists():
+        return []  # the common case for report reads: skip the lock
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [_REFRESH_LOCK_KEY])
+    if days is None:
+        pending = list(ReportChange.objects.values_list("id", "day"))
+        # Delete exactly the rows read: their tickets are committed and visible below.
+        ReportChange.objects.filter(pk__in=[pk for pk, _ in pending]).delete()
+        days = {day for _, day in pending}
+    days = sorted(set(days))
+    rebuild_days(days)
+    return days
+
+
+def _money(value: Optional[Decimal]) -> str:
+    # Same as prices elsewhere in the API: a 2-dp string, not a JSON float.
+    return str((value or Decimal("0")).quantize(Decimal("0.01")))
+
+
+def sales(date_from: date, date_to: date, group_by: List[str]) -> dict:
+    fields = [f for key in group_by for f in SALES_GROUPS[key]]
+    rows = (SalesSummary.objects
+        .filter(day__gte=date_from, day__lte=date_to)
+        .values(*fields)
+        .annotate(tickets=Sum("tickets"), revenue=Sum("revenue"))
+        .order_by(*fields))
+    totals = SalesSummary.objects.filter(day__gte=date_from, day__lte=date_to).aggregate(
+        tickets=Sum("tickets"), revenue=Sum("revenue"))
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "group_by": group_by,
+        "rows": [{**row, "revenue": _money(row["revenue"])} for row in rows],
+        "totals": {"tickets": totals["tickets"] or 0, "revenue": _money(totals["revenue"])},
+    }
+
+
+def seat_heatmap(hall: Hall, date_from: date, date_to: date) -> dict:
+    """Tickets sold per seat of ``hall`` and the share of sessions each seat was sold for."""
+    start, _ = _day_range(date_from)
+    _, end = _day_range(date_to)
+    sessions = (Session.objects
+        .filter(hall=hall, starts_at__gte=start, starts_at__lt=end)
+        .exclude(status=SessionStatus.CANCELLED)
+        .count())
+    seats = (SeatSalesSummary.objects
+        .filter(hall=hall, day__gte=date_from, day__lte=date_to)
+        .values("row", "number")
+        .annotate(tickets=Sum("tickets"))
+        .order_by("row", "number"))
+    return {
+        "hall_id": hall.pk,
+        "date_from": date_from,
+        "date_to": date_to,
+        "sessions": sessions,
+        "seats": [
+            {"row": s["row"], "seat": s["number"], "tickets": s["tickets"],
+             "rate": round(s["tickets"] / sessions, 4) if sessions else 0.0}
+            for s in seats
+        ],
+    }
@@ -13,28 +13,42 @@ from .models import (
     Session, SessionStatus,
     Booking, Ticket
 )
+from .metrics import TimedRepresentationMixin
+from .reports import SALES_GROUPS
 
-class HallSerializer(serializers.ModelSerializer):
+class HallSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = Hall
-        fields = ["id","name","rows_count","seats_per_row","is_active"]
+        fields = ["id","name","rows_count","seats_per_row","is_active","capacity"]
 
-class SeatSerializer(serializers.ModelSerializer):
+class SeatSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = Seat
         fields = ["id","hall","row","number","seat_type"]
 
-class HallPriceSerializer(serializers.ModelSerializer):
+class SeatLayoutRuleSerializer(serializers.Serializer):
+    """Правило раскладки мест: например {"seat_type": "VIP", "last_rows": 2}."""
+    seat_type = serializers.ChoiceField(choices=SeatType.choices)
+    last_rows = serializers.IntegerField(min_value=1, required=False)
+    row_from = serializers.IntegerField(min_value=1, required=False)
+    row_to = serializers.IntegerField(min_value=1, required=False)
+    seat_from = serializers.IntegerField(min_value=1, required=False)
+    seat_to = serializers.IntegerField(min_value=1, required=False)
+
+class GenerateSeatsSerializer(serializers.Serializer):
+    layout = SeatLayoutRuleSerializer(many=True, required=False)
+
+class HallPriceSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = HallPrice
         fields = ["hall","standard_price","vip_price"]
 
-class MovieSerializer(serializers.ModelSerializer):
+class MovieSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = Movie
         fields = ["id","title","description","duration_minutes","poster_url","is_active"]
 
-class SessionSerializer(serializers.ModelSerializer):
+class SessionSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     movie = MovieSerializer(read_only=True)
     hall = HallSerializer(read_only=True)
     movie_id = serializers.PrimaryKeyRelatedField(queryset=Movie.objects.all(), source="movie", write_only=True)
@@ -42,7 +56,7 @@ class SessionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Session
-        fields = ["id","movie","hall","movie_id","hall_id","starts_at","ends_at","status"]
+        fields = ["id","movie","hall","movie_id","hall_id","starts_at","ends_at","status","sold_count"]
 
     def validate(self, attrs):
         # If creating: compute ends_at if not provided
@@ -60,6 +74,46 @@ class SessionSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("ends_at must be after starts_at.")
         return attrs
 
+class SessionAdminSerializer(SessionSerializer):
+    class Meta(SessionSerializer.Meta):
+        fields = SessionSerializer.Meta.fields + ["revenue"]
+        # Отмена только через sessions/<pk>/cancel/ (cancel_session): билеты, счётчики, отчёты
+        read_only_fields = ["status"]
+
+class ScheduleSessionSerializer(SessionSerializer):
+    # Annotated by schedule_range_sessions() from the sales counters
+    seats_free = serializers.IntegerField(read_only=True)
+
+    class Meta(SessionSerializer.Meta):
+        fields = SessionSerializer.Meta.fields + ["seats_free"]
+
+class ScheduleRangeQuerySerializer(serializers.Serializer):
+    MAX_DAYS = 31
+
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    hall = serializers.IntegerField(min_value=1, required=False)
+    movie = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault("date_from", timezone.localdate())
+        attrs.setdefault("date_to", attrs["date_from"] + timedelta(days=6))
+        if attrs["date_from"] > attrs["date_to"]:
+            raise serializers.ValidationError("date_from должна быть не позже date_to.")
+        if (attrs["date_to"] - attrs["date_from"]).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(f"Период расписания не больше {self.MAX_DAYS} дней.")
+        return attrs
+
+class SessionBulkItemSerializer(serializers.Serializer):
+    hall_id = serializers.IntegerField(min_value=1)
+    movie_id = serializers.IntegerField(min_value=1)
+    starts_at = serializers.DateTimeField()
+    ends_at = serializers.DateTimeField(required=False)
+    status = serializers.ChoiceField(choices=SessionStatus.choices, default=SessionStatus.ACTIVE)
+
+class SessionBulkCreateSerializer(serializers.Serializer):
+    sessions = SessionBulkItemSerializer(many=True, allow_empty=False, max_length=2000)
+
 class PublicSessionDetailSerializer(serializers.Serializer):
     session = SessionSerializer()
     hall_seats = serializers.ListField()
@@ -70,36 +124,112 @@ class BookingSeatIn(serializers.Serializer):
     row = serializers.IntegerField(min_value=1)
     seat = serializers.IntegerField(min_value=1)
 
-class BookingCreateSerializer(serializers.Serializer):
+def unique_seats(seats):
+    seen = set()
+    uniq = []
+    for s in seats:
+        key = (s["row"], s["seat"])
+        if key not in seen:
+            seen.add(key)
+            uniq.append(s)
+    return uniq
+
+class BookingCustomerSerializer(serializers.Serializer):
     customer_name = serializers.CharField(max_length=200)
     customer_email = serializers.EmailField(required=False, allow_null=True, allow_blank=True)
     customer_phone = serializers.CharField(required=False, allow_null=True, allow_blank=True, max_length=32)
-    seats = BookingSeatIn(many=True)
 
     def validate(self, attrs):
         email = attrs.get("customer_email")
         phone = attrs.get("customer_phone")
         if not (email or phone):
             raise serializers.ValidationError("Укажите email или телефон.")
+        return attrs
+
+class BookingCreateSerializer(BookingCustomerSerializer):
+    seats = BookingSeatIn(many=True)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
         if not attrs["seats"]:
             raise serializers.ValidationError("Выберите хотя бы одно место.")
         # Remove duplicates
-        seen = set()
-        uniq = []
-        for s in attrs["seats"]:
-            key = (s["row"], s["seat"])
-            if key not in seen:
-                seen.add(key)
-                uniq.append(s)
-        attrs["seats"] = uniq
+        attrs["seats"] = unique_seats(attrs["seats"])
         return attrs
 
-class TicketSerializer(serializers.ModelSerializer):
+class BestSeatsBookingSerializer(BookingCustomerSerializer):
+    count = serializers.IntegerField(min_value=1, max_value=10)
+    seat_type = serializers.ChoiceField(choices=SeatType.choices, required=False)
+    row_from = serializers.IntegerField(min_value=1, required=False)
+    row_to = serializers.IntegerField(min_value=1, required=False)
+    centre = serializers.BooleanField(default=True)
+    contiguous = serializers.BooleanField(default=True)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if attrs.get("row_from") and attrs.get("row_to") and attrs["row_from"] > attrs["row_to"]:
+            raise serializers.ValidationError("row_from должен быть не больше row_to.")
+        return attrs
+
+class SeatHoldCreateSerializer(serializers.Serializer):
+    seats = BookingSeatIn(many=True)
+    minutes = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        if not attrs["seats"]:
+            raise serializers.ValidationError("Выберите хотя бы одно место.")
+        attrs["seats"] = unique_seats(attrs["seats"])
+        return attrs
+
+class TicketSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = ["code","row_snapshot","seat_snapshot","seat_type_snapshot","price_snapshot"]
 
-class BookingSerializer(serializers.ModelSerializer):
+class TicketScanSerializer(serializers.Serializer):
+    codes = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=1000)
+    session_id = serializers.IntegerField(min_value=1, required=False)
+
+class TicketScanResultSerializer(TimedRepresentationMixin, serializers.Serializer):
+    code = serializers.CharField()
+    status = serializers.CharField()
+    session_id = serializers.IntegerField(required=False)
+    row = serializers.IntegerField(required=False)
+    seat = serializers.IntegerField(required=False)
+    admitted_at = serializers.DateTimeField(required=False)
+
+class TicketAdmissionSerializer(serializers.Serializer):
+    code = serializers.UUIDField()
+    scanned_at = serializers.DateTimeField()
+
+class TicketSyncSerializer(serializers.Serializer):
+    session_id = serializers.IntegerField(min_value=1)
+    admissions = TicketAdmissionSerializer(many=True, allow_empty=False, max_length=5000)
+
+class ReportQuerySerializer(serializers.Serializer):
+    MAX_DAYS = 366
+
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    group_by = serializers.CharField(required=False, default="day")
+
+    def validate_group_by(self, value):
+        keys = [k.strip() for k in value.split(",") if k.strip()]
+        unknown = [k for k in keys if k not in SALES_GROUPS]
+        if unknown or not keys:
+            raise serializers.ValidationError(f"Допустимые группировки: {', '.join(SALES_GROUPS)}.")
+        return list(dict.fromkeys(keys))
+
+    def validate(self, attrs):
+        attrs.setdefault("date_to", timezone.localdate())
+        attrs.setdefault("date_from", attrs["date_to"] - timedelta(days=29))
+        if attrs["date_from"] > attrs["date_to"]:
+            raise serializers.ValidationError("date_from должна быть не позже date_to.")
+        if (attrs["date_to"] - attrs["date_from"]).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(f"Период отчёта не больше {self.MAX_DAYS} дней.")
+        return attrs
+
+class BookingSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     tickets = TicketSerializer(many=True, read_only=True)
     session = SessionSerializer(read_only=True)
 
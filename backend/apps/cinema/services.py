@@ -1,33 +1,155 @@
 from __future__ import annotations
+from contextlib import contextmanager
+from datetime import timedelta
 from decimal import Decimal
-from typing import List, Tuple
-from django.db import transaction, IntegrityError
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction, IntegrityError, OperationalError
+from django.db.models import Count, DecimalField, F, OuterRef, ProtectedError, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 
-from .models import Hall, Seat, SeatType, HallPrice, Session, SessionStatus, Booking, Ticket
+from . import allocator, caches, events, holds, idempotency, occupancy, qr, reports
+from .models import (
+    Hall, Seat, SeatType, HallPrice, Movie, Session, SessionStatus, Booking, BookingStatus, Ticket,
+    SESSION_OVERLAP_CONSTRAINT,
+)
 
 class BookingConflict(Exception):
     pass
 
+class ScheduleConflict(Exception):
+    def __init__(self, conflicts: List[dict]):
+        self.conflicts = conflicts
+        super().__init__("Сеансы пересекаются с другими сеансами в этих залах.")
+
 def calc_price(seat_type: str, prices: HallPrice) -> Decimal:
     return prices.vip_price if seat_type == SeatType.VIP else prices.standard_price
 
-@transaction.atomic
-def create_booking(session_id: int, customer_name: str, customer_email: str|None, customer_phone: str|None, seats: List[Tuple[int,int]]):
-    session = get_object_or_404(Session.objects.select_related("hall","movie"), pk=session_id)
+def resolve_seats(hall: Hall, seats: List[Tuple[int,int]]) -> List[Seat]:
+    """Fetch the requested (row, number) seats of a hall with a single query."""
+    if not seats:
+        raise ValueError("Выберите хотя бы одно место.")
+    wanted = Q()
+    for row, num in seats:
+        wanted |= Q(row=row, number=num)
+    found = {(s.row, s.number): s for s in Seat.objects.filter(wanted, hall=hall)}
+    missing = [(row, num) for row, num in seats if (row, num) not in found]
+    if missing:
+        raise Http404("Места не найдены: " + holds.seats_label(missing) + ".")
+    return [found[(row, num)] for row, num in seats]
+
+def _ensure_on_sale(session: Session) -> None:
     if session.status != SessionStatus.ACTIVE:
         raise ValueError("Сеанс не активен.")
     if not session.hall.is_active:
         raise ValueError("Продажа билетов для этого зала приостановлена.")
 
-    # Ensure price exists
-    prices, _ = HallPrice.objects.get_or_create(hall=session.hall, defaults={"standard_price":0, "vip_price":0})
+def hold_seats(session_id: int, seats: List[Tuple[int,int]], minutes: int|None = None) -> holds.Hold:
+    """Hold free seats for a few minutes; checked against the cached seat map only."""
+    session = get_object_or_404(Session.objects.select_related("hall","movie"), pk=session_id)
+    _ensure_on_sale(session)
+    if not seats:
+        raise ValueError("Выберите хотя бы одно место.")
+    occ = occupancy.get_session_occupancy(session)
+    missing = [(r, n) for r, n in seats if occ.layout.index(r, n) is None]
+    if missing:
+        raise Http404("Места не найдены: " + holds.seats_label(missing) + ".")
+    if any(occ.is_occupied(r, n) for r, n in seats):
+        raise BookingConflict("Одно или несколько мест уже занято.")
 
-    # Validate and fetch seats
-    seat_objs = []
-    for row, num in seats:
-        seat = get_object_or_404(Seat, hall=session.hall, row=row, number=num)
-        seat_objs.append(seat)
+    minutes = min(minutes or settings.SEAT_HOLD_MINUTES, settings.SEAT_HOLD_MAX_MINUTES)
+    holds.ensure_sweeper()
+    try:
+        return holds.store.hold(session.pk, seats, minutes * 60)
+    except holds.SeatsHeld as e:
+        raise BookingConflict(str(e))
+
+def confirm_hold(session_id: int, token: str, customer_name: str, customer_email: str|None, customer_phone: str|None):
+    hold = holds.store.get(token)
+    if hold is None or hold.session_id != session_id:
+        raise Http404("Бронь не найдена или истекла.")
+    return create_booking(
+        session_id=session_id,
+        customer_name=customer_name,
+        customer_email=customer_email,
+        customer_phone=customer_phone,
+        seats=list(hold.seats),
+        hold_token=token,
+    )
+
+# BOOKING_CONCURRENCY_MODE: how create_booking treats seats other transactions are booking.
+#   constraint   - nothing up front; the losers of a race fail on the unique ticket constraint
+#   nowait       - lock the Seat rows FOR NO KEY UPDATE NOWAIT, fail at once if any is taken
+#   skip_locked  - same with SKIP LOCKED: fail if any seat row was skipped
+#   advisory     - one pg_advisory_xact_lock per session, bookings of a session queue up
+# All but "constraint" also check for sold seats right after locking, before the Booking insert.
+# Seat rows are shared by every session of a hall, so the row modes briefly serialize
+# bookings of the same seat in different sessions too.
+BOOKING_MODES = ("constraint", "nowait", "skip_locked", "advisory")
+_BOOKING_LOCK_SPACE = 2
+_LOCK_NOT_AVAILABLE = "55P03"
+
+def _advisory_xact_lock(space: int, object_id: int) -> None:
+    """pg_advisory_xact_lock on one bigint key: ``space`` in the top byte, the id below.
+
+    The (int4, int4) form would fail for BigAutoField ids above 2**31 - 1.
+    """
+    if not 0 <= object_id < 1 << 56:
+        raise ValueError(f"id вне диапазона ключа блокировки: {object_id}")
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [(space << 56) | object_id])
+
+def _is_lock_not_available(exc: OperationalError) -> bool:
+    cause = exc.__cause__
+    return (getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)) == _LOCK_NOT_AVAILABLE
+
+def _claim_seats(session: Session, seat_objs: List[Seat]) -> None:
+    mode = settings.BOOKING_CONCURRENCY_MODE
+    if mode == "constraint":
+        return
+    if mode == "advisory":
+        _advisory_xact_lock(_BOOKING_LOCK_SPACE, session.pk)
+    elif mode in ("nowait", "skip_locked"):
+        rows = (Seat.objects
+            .filter(pk__in=[seat.pk for seat in seat_objs])
+            .order_by("pk")
+            .select_for_update(no_key=True, nowait=mode == "nowait", skip_locked=mode == "skip_locked")
+            .values_list("pk", flat=True))
+        try:
+            locked = len(rows)
+        except OperationalError as e:
+            # NOWAIT: some row is locked. Dropped connections, timeouts etc. are not a 409.
+            if not _is_lock_not_available(e):
+                raise
+            locked = -1
+        if locked != len(seat_objs):
+            raise BookingConflict("Одно или несколько мест сейчас бронируются, попробуйте ещё раз.")
+    else:
+        raise ImproperlyConfigured(f"BOOKING_CONCURRENCY_MODE должен быть одним из: {', '.join(BOOKING_MODES)}.")
+    # Committed sales are visible now that this transaction is first in line for the seats.
+    if Ticket.objects.filter(session_id=session.pk, seat__in=seat_objs, cancelled_at__isnull=True).exists():
+        raise BookingConflict("Одно или несколько мест уже занято.")
+
+@transaction.atomic
+def create_booking(session_id: int, customer_name: str, customer_email: str|None, customer_phone: str|None, seats: List[Tuple[int,int]], hold_token: str|None = None, request_key: Tuple[str,str]|None = None):
+    """``request_key`` is an (Idempotency-Key, fingerprint) pair; see idempotency.py."""
+    # Seats held by someone else would only fail later on the unique constraint.
+    held = holds.store.conflicts(session_id, seats, token=hold_token)
+    if held:
+        raise BookingConflict(str(holds.SeatsHeld(held)))
+    key_entry = idempotency.claim(*request_key) if request_key else None
+
+    session = get_object_or_404(Session.objects.select_related("hall","movie"), pk=session_id)
+    _ensure_on_sale(session)
+
+    prices = occupancy.get_hall_prices(session.hall)
+
+    seat_objs = resolve_seats(session.hall, seats)
+    _claim_seats(session, seat_objs)
 
     booking = Booking.objects.create(
         session=session,
@@ -36,6 +158,9 @@ def create_booking(session_id: int, customer_name: str, customer_email: str|None
         customer_phone=customer_phone or None,
         status="CONFIRMED",
     )
+    if key_entry is not None:
+        key_entry.booking = booking
+        key_entry.save(update_fields=["booking"])
 
     tickets = []
     for seat in seat_objs:
@@ -56,4 +181,306 @@ def create_booking(session_id: int, customer_name: str, customer_email: str|None
         # Unique constraint on (session, seat) hit
         raise BookingConflict("Одно или несколько мест уже занято.")
 
+    # Bump last so the session row stays locked for as short as possible.
+    Session.objects.filter(pk=session.pk).update(
+        occupancy_version=F("occupancy_version") + 1,
+        sold_count=F("sold_count") + len(tickets),
+        revenue=F("revenue") + sum((t.price_snapshot for t in tickets), Decimal("0")),
+    )
+    # Read the bumped values back so the returned booking shows the session as of this sale.
+    version, session.sold_count, session.revenue = (Session.objects.filter(pk=session.pk)
+        .values_list("occupancy_version", "sold_count", "revenue").get())
+    session.occupancy_version = version
+    reports.mark_changed(timezone.localdate(session.starts_at))
+    booked = [(seat.row, seat.number) for seat in seat_objs]
+    transaction.on_commit(lambda: occupancy.mark_occupied(session.pk, version, booked))
+    transaction.on_commit(lambda: events.seats_event("occupied", session.pk, booked, version=version))
+    if hold_token:
+        transaction.on_commit(lambda: holds.store.release(hold_token))
+    transaction.on_commit(lambda: qr.pregenerate(tickets))
+    transaction.on_commit(lambda: caches.invalidate_schedule_day(timezone.localdate(session.starts_at)))
+
+    return booking
+
+# Lock space of the per-session advisory lock taken by seat allocation.
+_ALLOCATION_LOCK_SPACE = 1
+ALLOCATION_ATTEMPTS = 3
+
+@transaction.atomic
+def book_best_available(session_id: int, prefs: allocator.Preferences, customer_name: str, customer_email: str|None, customer_phone: str|None):
+    """Pick the best free seats for ``prefs`` and book them in the same transaction.
+
+    Allocations of a session are serialized by an advisory lock, so two of
+    them never pick the same block. A manual booking can still take a picked
+    seat first; the seat map is then reloaded and the pick repeated.
+    """
+    _advisory_xact_lock(_ALLOCATION_LOCK_SPACE, session_id)
+    for attempt in range(ALLOCATION_ATTEMPTS):
+        session = get_object_or_404(Session.objects.select_related("hall"), pk=session_id)
+        _ensure_on_sale(session)
+        occ = occupancy.get_session_occupancy(session)
+        seats = allocator.find_best(occ, prefs, blocked=holds.store.held_seats(session_id))
+        if seats is None:
+            raise BookingConflict("Нет свободных мест с такими условиями.")
+        try:
+            return create_booking(session_id, customer_name, customer_email, customer_phone, seats)
+        except BookingConflict:
+            if attempt == ALLOCATION_ATTEMPTS - 1:
+                raise
+
+def _release_tickets(session_id: int, tickets) -> int:
+    """Cancel the live tickets among ``tickets`` (all of one session) and free their seats.
+
+    Set-based: one locking read, one UPDATE of the tickets and one of the
+    session counters; the seat bitmap and streams are patched after commit.
+    """
+    live = tickets.filter(cancelled_at__isnull=True)
+    rows = list(live.select_for_update().values_list("row_snapshot", "seat_snapshot", "price_snapshot"))
+    if not rows:
+        return 0
+    live.update(cancelled_at=timezone.now())
+    Session.objects.filter(pk=session_id).update(
+        occupancy_version=F("occupancy_version") + 1,
+        sold_count=F("sold_count") - len(rows),
+        revenue=F("revenue") - sum((price for _, _, price in rows), Decimal("0")),
+    )
+    version, starts_at = Session.objects.filter(pk=session_id).values_list("occupancy_version", "starts_at").get()
+    reports.mark_changed(timezone.localdate(starts_at))
+    freed = [(row, number) for row, number, _ in rows]
+    transaction.on_commit(lambda: occupancy.mark_released(session_id, version, freed))
+    transaction.on_commit(lambda: events.seats_event("freed", session_id, freed, version=version))
+    transaction.on_commit(lambda: caches.invalidate_schedule_day(timezone.localdate(starts_at)))
+    return len(rows)
+
+@transaction.atomic
+def cancel_booking(booking_id: int) -> Booking:
+    booking = get_object_or_404(Booking.objects.select_for_update(), pk=booking_id)
+    if booking.status == BookingStatus.CANCELLED:
+        raise ValueError("Бронь уже отменена.")
+    _release_tickets(booking.session_id, Ticket.objects.filter(booking=booking))
+    booking.status = BookingStatus.CANCELLED
+    booking.save(update_fields=["status"])
     return booking
+
+@transaction.atomic
+def cancel_session(session_id: int) -> dict:
+    """Cancel a session with all its bookings; returns how many were cancelled."""
+    session = get_object_or_404(Session.objects.select_for_update(), pk=session_id)
+    session.status = SessionStatus.CANCELLED
+    session.save(update_fields=["status"])
+    tickets = _release_tickets(session.pk, Ticket.objects.filter(session=session))
+    bookings = (Booking.objects
+        .filter(session=session)
+        .exclude(status=BookingStatus.CANCELLED)
+        .update(status=BookingStatus.CANCELLED))
+    transaction.on_commit(lambda: events.publish(session.pk, {"type": "cancelled"}))
+    return {"bookings": bookings, "tickets": tickets}
+
+def session_counters() -> dict:
+    """sold_count/revenue of the outer session row recomputed from its tickets."""
+    tickets = Ticket.objects.filter(session_id=OuterRef("pk"), cancelled_at__isnull=True).order_by().values("session_id")
+    return {
+        "sold_count": Coalesce(Subquery(tickets.annotate(n=Count("id")).values("n")), 0),
+        "revenue": Coalesce(
+            Subquery(tickets.annotate(s=Sum("price_snapshot")).values("s")),
+            Value(Decimal("0.00")), output_field=DecimalField(max_digits=12, decimal_places=2),
+        ),
+    }
+
+class ScanStatus:
+    ADMITTED = "admitted"
+    ALREADY_ADMITTED = "already_admitted"
+    WRONG_SESSION = "wrong_session"
+    CANCELLED = "cancelled"
+    NOT_FOUND = "not_found"
+
+@transaction.atomic
+def admit_tickets(scans: Iterable[Tuple[object, object]], session_id: int|None = None) -> List[dict]:
+    """Mark scanned tickets as admitted; one result per distinct code, in scan order.
+
+    ``scans`` are (code, scanned_at) pairs; ``scanned_at`` is None for live
+    scans and the scanner's clock for offline syncs (never later than now).
+    The tickets are read and locked with one query on ``code``, so two doors
+    scanning the same ticket can't both admit it.
+    """
+    now = timezone.now()
+    wanted: Dict[object, object] = {}
+    for code, scanned_at in scans:
+        wanted.setdefault(code, min(scanned_at, now) if scanned_at else now)
+
+    found = {t["code"]: t for t in (Ticket.objects
+        .select_for_update()
+        .filter(code__in=list(wanted))
+        .values("id", "code", "session_id", "row_snapshot", "seat_snapshot", "admitted_at", "cancelled_at"))}
+
+    results, admit = [], []
+    for code, at in wanted.items():
+        ticket = found.get(code)
+        result = {"code": str(code), "status": ScanStatus.NOT_FOUND}
+        if ticket is not None:
+            result.update(session_id=ticket["session_id"], row=ticket["row_snapshot"], seat=ticket["seat_snapshot"])
+            if session_id is not None and ticket["session_id"] != session_id:
+                result["status"] = ScanStatus.WRONG_SESSION
+            elif ticket["cancelled_at"] is not None:
+                result["status"] = ScanStatus.CANCELLED
+            elif ticket["admitted_at"] is not None:
+                result.update(status=ScanStatus.ALREADY_ADMITTED, admitted_at=ticket["admitted_at"])
+            else:
+                result.update(status=ScanStatus.ADMITTED, admitted_at=at)
+                admit.append(Ticket(pk=ticket["id"], admitted_at=at))
+        results.append(result)
+
+    if len({t.admitted_at for t in admit}) == 1:
+        # Live scans share one timestamp: a plain UPDATE ... WHERE id IN (...)
+        Ticket.objects.filter(pk__in=[t.pk for t in admit]).update(admitted_at=admit[0].admitted_at)
+    elif admit:
+        Ticket.objects.bulk_update(admit, ["admitted_at"], batch_size=1000)
+    return results
+
+def ticket_manifest(session: Session) -> dict:
+    """Compact list of the session's ticket codes for scanners working offline."""
+    codes, admitted = [], []
+    for code, admitted_at in Ticket.objects.filter(session=session, cancelled_at__isnull=True).order_by("code").values_list("code", "admitted_at"):
+        codes.append(code.hex)
+        if admitted_at is not None:
+            admitted.append(code.hex)
+    return {
+        "session_id": session.pk,
+        "generated_at": timezone.now(),
+        "count": len(codes),
+        "codes": codes,
+        "admitted": admitted,
+    }
+
+def find_overlaps(intervals: Iterable[Tuple[int, object, object, object]]) -> List[Tuple[object, object]]:
+    """Overlapping pairs among (hall_id, starts_at, ends_at, key) intervals.
+
+    One sort plus a sweep per hall: an interval overlaps an earlier one
+    exactly when it starts before the furthest end seen so far in that hall.
+    """
+    pairs = []
+    current_hall = reach_end = reach_key = None
+    for hall_id, starts_at, ends_at, key in sorted(intervals, key=lambda i: (i[0], i[1], i[2])):
+        if hall_id != current_hall:
+            current_hall, reach_end, reach_key = hall_id, ends_at, key
+            continue
+        if starts_at < reach_end:
+            pairs.append((reach_key, key))
+        if ends_at > reach_end:
+            reach_end, reach_key = ends_at, key
+    return pairs
+
+def is_session_overlap_error(exc: IntegrityError) -> bool:
+    diag = getattr(exc.__cause__, "diag", None)
+    return getattr(diag, "constraint_name", None) == SESSION_OVERLAP_CONSTRAINT
+
+@contextmanager
+def session_overlap_errors():
+    """Turn a violation of the session exclusion constraint into ScheduleConflict."""
+    try:
+        yield
+    except IntegrityError as e:
+        if not is_session_overlap_error(e):
+            raise
+        detail = getattr(getattr(e.__cause__, "diag", None), "message_detail", None)
+        raise ScheduleConflict([{"db_detail": detail}] if detail else [])
+
+@transaction.atomic
+def bulk_create_sessions(items: List[dict]) -> List[Session]:
+    """Create many sessions at once: 2 reads and one INSERT.
+
+    Overlaps with stored sessions are rejected by the exclusion constraint;
+    the in-memory sweep only makes clashes inside the batch name their items.
+    """
+    halls = Hall.objects.in_bulk({item["hall_id"] for item in items})
+    movies = Movie.objects.in_bulk({item["movie_id"] for item in items})
+    missing_halls = sorted({item["hall_id"] for item in items} - set(halls))
+    missing_movies = sorted({item["movie_id"] for item in items} - set(movies))
+    if missing_halls or missing_movies:
+        raise ValueError(f"Не найдены залы {missing_halls} или фильмы {missing_movies}.")
+
+    sessions = []
+    for idx, item in enumerate(items):
+        movie = movies[item["movie_id"]]
+        ends_at = item.get("ends_at") or item["starts_at"] + timedelta(minutes=movie.duration_minutes)
+        if ends_at <= item["starts_at"]:
+            raise ValueError(f"Сеанс #{idx}: окончание должно быть позже начала.")
+        sessions.append(Session(
+            hall=halls[item["hall_id"]],
+            movie=movie,
+            starts_at=item["starts_at"],
+            ends_at=ends_at,
+            status=item.get("status", SessionStatus.ACTIVE),
+        ))
+
+    pairs = find_overlaps((s.hall_id, s.starts_at, s.ends_at, idx)
+                          for idx, s in enumerate(sessions) if s.status == SessionStatus.ACTIVE)
+    if pairs:
+        raise ScheduleConflict([{"index": b, "conflicts_with": {"new": a}} for a, b in pairs])
+
+    with session_overlap_errors():
+        created = Session.objects.bulk_create(sessions)
+    # bulk_create bypasses post_save, so the schedule cache is reset here.
+    transaction.on_commit(caches.bump_schedule_version)
+    return created
+
+_INSERT_MISSING_SEATS_SQL = """
+    INSERT INTO {seat} ({hall_id}, {row}, {number}, {seat_type})
+    SELECT %(hall)s, r, n, %(seat_type)s
+    FROM generate_series(1, %(rows)s) AS r CROSS JOIN generate_series(1, %(seats)s) AS n
+    WHERE NOT EXISTS (
+        SELECT 1 FROM {seat} s WHERE s.{hall_id} = %(hall)s AND s.{row} = r AND s.{number} = n
+    )
+    ON CONFLICT ({hall_id}, {row}, {number}) DO NOTHING
+"""
+
+def _layout_rule_filter(hall: Hall, rule: dict) -> Q:
+    q = Q()
+    if rule.get("last_rows"):
+        q &= Q(row__gt=hall.rows_count - rule["last_rows"])
+    if rule.get("row_from"):
+        q &= Q(row__gte=rule["row_from"])
+    if rule.get("row_to"):
+        q &= Q(row__lte=rule["row_to"])
+    if rule.get("seat_from"):
+        q &= Q(number__gte=rule["seat_from"])
+    if rule.get("seat_to"):
+        q &= Q(number__lte=rule["seat_to"])
+    return q
+
+@transaction.atomic
+def regenerate_seat_grid(hall: Hall, layout: Optional[List[dict]] = None) -> dict:
+    """Bring the seat grid of a hall to rows_count x seats_per_row with set-based SQL.
+
+    Seats outside the grid are deleted with one DELETE, only missing cells are
+    inserted (as STANDARD) and each ``layout`` rule, e.g.
+    ``{"seat_type": "VIP", "last_rows": 2}``, becomes a single UPDATE. Later
+    rules win. Seats with tickets can't be deleted (``ProtectedError``).
+    """
+    with occupancy.hall_changes():
+        stale = Seat.objects.filter(hall=hall).filter(Q(row__gt=hall.rows_count) | Q(number__gt=hall.seats_per_row))
+        # QuerySet.delete() would load every seat through the collector just to check
+        # the PROTECT of tickets; check it with one EXISTS instead (the FK still guards races).
+        protected = Ticket.objects.filter(seat__in=stale)
+        if protected.exists():
+            raise ProtectedError("Места за пределами зала уже проданы, их нельзя удалить.", protected)
+        deleted = stale._raw_delete(stale.db)
+
+        qn = connection.ops.quote_name
+        fields = {f: qn(Seat._meta.get_field(f).column) for f in ("hall", "row", "number", "seat_type")}
+        sql = _INSERT_MISSING_SEATS_SQL.format(
+            seat=qn(Seat._meta.db_table), hall_id=fields["hall"], row=fields["row"],
+            number=fields["number"], seat_type=fields["seat_type"],
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {"hall": hall.pk, "seat_type": SeatType.STANDARD,
+                                 "rows": hall.rows_count, "seats": hall.seats_per_row})
+            created = max(cursor.rowcount, 0)
+
+        updated = 0
+        for rule in layout or []:
+            updated += Seat.objects.filter(_layout_rule_filter(hall, rule), hall=hall).update(seat_type=rule["seat_type"])
+
+        if deleted or created or updated:
+            occupancy.bump_hall_version(hall.pk)
+    return {"created": created, "deleted": deleted, "updated": updated}
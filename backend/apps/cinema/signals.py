@@ -0,0 +1,32 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caches import bump_movies_version, bump_schedule_version
+from .models import Hall, HallPrice, Movie, Seat, Session
+from .occupancy import bump_hall_version
+
+
+@receiver([post_save, post_delete], sender=Seat)
+@receiver([post_save, post_delete], sender=HallPrice)
+def hall_config_changed(sender, instance, **kwargs):
+    bump_hall_version(instance.hall_id)
+
+
+@receiver(post_save, sender=Hall)
+def create_hall_prices(sender, instance, created, raw=False, **kwargs):
+    # Prices exist from the start so read paths never have to create them.
+    if created and not raw:
+        HallPrice.objects.get_or_create(hall=instance)
+
+
+@receiver([post_save, post_delete], sender=Session)
+@receiver([post_save, post_delete], sender=Movie)
+@receiver([post_save, post_delete], sender=Hall)
+def schedule_changed(sender, instance, **kwargs):
+    transaction.on_commit(bump_schedule_version)
+
+
+@receiver([post_save, post_delete], sender=Movie)
+def catalogue_changed(sender, instance, **kwargs):
+    transaction.on_commit(bump_movies_version)
@@ -1,12 +1,16 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from . import async_views
 from .views import (
-    MoviePublicViewSet, ScheduleView, SessionPublicView, BookSessionPublicView,
+    MoviePublicViewSet, ScheduleView, ScheduleRangeView, SessionPublicView, BookSessionPublicView, BookBestSeatsPublicView,
+    SeatHoldView, SeatHoldDetailView, SeatHoldConfirmView,
     TicketPublicView, TicketQrView,
-    HallAdminViewSet, SeatAdminViewSet, HallPriceAdminView,
+    HallAdminViewSet, SeatAdminViewSet, HallPriceAdminView, RequestMetricsAdminView,
+    TicketScanAdminView, TicketSyncAdminView, SalesReportAdminView, SeatHeatmapAdminView,
     MovieAdminViewSet, SessionAdminViewSet, BookingAdminViewSet
 )
 
@@ -20,12 +24,27 @@ router_admin.register(r"movies", MovieAdminViewSet, basename="admin-movies")
 router_admin.register(r"sessions", SessionAdminViewSet, basename="admin-sessions")
 router_admin.register(r"bookings", BookingAdminViewSet, basename="admin-bookings")
 
+if settings.ASYNC_PUBLIC_VIEWS:
+    schedule_view = async_views.schedule
+    session_view = async_views.session_detail
+    ticket_view = async_views.ticket_detail
+else:
+    schedule_view = ScheduleView.as_view()
+    session_view = SessionPublicView.as_view()
+    ticket_view = TicketPublicView.as_view()
+
 urlpatterns = [
     path("", include(router_public.urls)),
-    path("schedule/", ScheduleView.as_view(), name="schedule"),
-    path("sessions/<int:pk>/", SessionPublicView.as_view(), name="session-detail"),
+    path("schedule/", schedule_view, name="schedule"),
+    path("schedule/range/", ScheduleRangeView.as_view(), name="schedule-range"),
+    path("sessions/<int:pk>/", session_view, name="session-detail"),
+    path("sessions/<int:pk>/events/", async_views.session_events, name="session-events"),
     path("sessions/<int:pk>/book/", BookSessionPublicView.as_view(), name="session-book"),
-    path("tickets/<uuid:code>/", TicketPublicView.as_view(), name="ticket-detail"),
+    path("sessions/<int:pk>/book-best/", BookBestSeatsPublicView.as_view(), name="session-book-best"),
+    path("sessions/<int:pk>/holds/", SeatHoldView.as_view(), name="session-holds"),
+    path("sessions/<int:pk>/holds/<str:token>/", SeatHoldDetailView.as_view(), name="session-hold-detail"),
+    path("sessions/<int:pk>/holds/<str:token>/confirm/", SeatHoldConfirmView.as_view(), name="session-hold-confirm"),
+    path("tickets/<uuid:code>/", ticket_view, name="ticket-detail"),
     path("tickets/<uuid:code>/qr.png", TicketQrView.as_view(), name="ticket-qr"),
 
     # Admin auth (JWT)
@@ -35,4 +54,9 @@ urlpatterns = [
     # Admin API
     path("admin/", include(router_admin.urls)),
     path("admin/halls/<int:hall_id>/prices/", HallPriceAdminView.as_view(), name="hall-prices"),
+    path("admin/tickets/scan/", TicketScanAdminView.as_view(), name="ticket-scan"),
+    path("admin/tickets/sync/", TicketSyncAdminView.as_view(), name="ticket-sync"),
+    path("admin/reports/sales/", SalesReportAdminView.as_view(), name="report-sales"),
+    path("admin/reports/halls/<int:hall_id>/seats/", SeatHeatmapAdminView.as_view(), name="report-seat-heatmap"),
+    path("admin/metrics/", RequestMetricsAdminView.as_view(), name="request-metrics"),
 ]
@@ -1,102 +1,339 @@
 from __future__ import annotations
+import csv
+import io
 from datetime import datetime, date, timedelta
-from django.db.models import Prefetch
-from django.http import HttpResponse
+from decimal import Decimal
+from itertools import groupby
+from typing import Iterable, Iterator, List, Tuple
+from django.conf import settings
+from django.db.models import F, Prefetch
+from django.db.models.functions import Greatest
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
 
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAdminUser, AllowAny
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-import qrcode
-from io import BytesIO
-
+from . import allocator, caches, idempotency, qr, reports
+from .metrics import registry as metrics_registry
 from .models import Hall, Seat, HallPrice, Movie, Session, Booking, Ticket, SessionStatus
 from .serializers import (
     HallSerializer, SeatSerializer, HallPriceSerializer,
-    MovieSerializer, SessionSerializer,
-    BookingCreateSerializer, BookingSerializer
+    MovieSerializer, SessionSerializer, SessionAdminSerializer,
+    BookingCreateSerializer, BookingSerializer, BestSeatsBookingSerializer,
+    BookingCustomerSerializer, SeatHoldCreateSerializer, SessionBulkCreateSerializer,
+    GenerateSeatsSerializer, TicketScanSerializer, TicketSyncSerializer, TicketScanResultSerializer,
+    ReportQuerySerializer, ScheduleSessionSerializer, ScheduleRangeQuerySerializer,
+)
+from .occupancy import get_hall_prices, get_session_occupancy
+from .catalog import normalize_query, search_movies
+from .fastserializers import ValuesSerializer
+from .holds import store as hold_store
+from .pagination import CatalogPagination, KeysetPagination, iter_keyset
+from .services import (
+    create_booking, book_best_available, hold_seats, confirm_hold, bulk_create_sessions, regenerate_seat_grid,
+    session_overlap_errors, admit_tickets, cancel_booking, cancel_session, ticket_manifest, BookingConflict, ScheduleConflict,
 )
-from .services import create_booking, BookingConflict
+
+# Read-only hot paths serialize from .values() rows; output matches the DRF serializers.
+session_values = ValuesSerializer(SessionSerializer)
+schedule_range_values = ValuesSerializer(ScheduleSessionSerializer)
+booking_values = ValuesSerializer(BookingSerializer)
 
 # --------- PUBLIC ---------
 class MoviePublicViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
-    queryset = Movie.objects.filter(is_active=True).order_by("title")
+    """Active movies; the list takes ``?q=`` search and is paginated (see CatalogPagination)."""
+    queryset = Movie.objects.filter(is_active=True).order_by("title", "id")
     serializer_class = MovieSerializer
     permission_classes = [AllowAny]
+    pagination_class = CatalogPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        q = normalize_query(self.request.query_params.get("q", ""))
+        if self.action == "list" and q:
+            queryset = search_movies(queryset, q)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        params = {k: request.query_params.get(k, "") for k in ("page", "page_size", "cursor")}
+        params["q"] = normalize_query(request.query_params.get("q", "")).lower()
+        key = caches.movie_page_key(caches.movies_version(), request, params)
+        entry = caches.get_movie_page(key)
+        if entry is None:
+            response = super().list(request, *args, **kwargs)
+            entry = caches.store_movie_page(key, JSONRenderer().render(response.data))
+        return caches.conditional_json_response(request, entry)
+
+def parse_schedule_day(date_str: str | None) -> date:
+    """Day of ``?date=`` (today when missing); ValueError on a malformed date."""
+    if not date_str:
+        return timezone.localdate()
+    return datetime.fromisoformat(date_str).date()
+
+def _day_start(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+def schedule_sessions(day: date):
+    start = _day_start(day)
+    end = _day_start(day + timedelta(days=1))
+    return (Session.objects
+        .select_related("movie","hall")
+        .filter(starts_at__gte=start, starts_at__lt=end, status=SessionStatus.ACTIVE, hall__is_active=True, movie__is_active=True)
+        .order_by("starts_at")
+    )
+
+def schedule_range_sessions(date_from: date, date_to: date, hall: int | None = None, movie: int | None = None):
+    """Public sessions of a date range with free seat counts, in one query over Session(starts_at)."""
+    sessions = Session.objects.filter(
+        starts_at__gte=_day_start(date_from), starts_at__lt=_day_start(date_to + timedelta(days=1)),
+        status=SessionStatus.ACTIVE, hall__is_active=True, movie__is_active=True,
+    )
+    if hall:
+        sessions = sessions.filter(hall_id=hall)
+    if movie:
+        sessions = sessions.filter(movie_id=movie)
+    return (sessions
+        .annotate(seats_free=Greatest(F("hall__capacity") - F("sold_count"), 0))
+        .order_by("starts_at", "id"))
+
+def schedule_range_days(date_from: date, date_to: date, rows: Iterable[dict]) -> Iterator[Tuple[date, List[dict]]]:
+    """(day, sessions) for every day of the range, empty ones included; ``rows`` ordered by starts_at."""
+    tz = timezone.get_current_timezone()
+    groups = groupby(rows, key=lambda row: row["starts_at"].astimezone(tz).date())
+    group = next(groups, None)
+    day = date_from
+    while day <= date_to:
+        if group is not None and group[0] == day:
+            yield day, schedule_range_values.serialize_rows(group[1])
+            group = next(groups, None)
+        else:
+            yield day, []
+        day += timedelta(days=1)
+
+def render_schedule_range(date_from: date, date_to: date, days) -> Iterator[bytes]:
+    renderer = JSONRenderer()
+    yield b'{"date_from":"%s","date_to":"%s","days":[' % (date_from.isoformat().encode(), date_to.isoformat().encode())
+    for i, (day, sessions) in enumerate(days):
+        yield (b"," if i else b"") + renderer.render({"date": str(day), "sessions": sessions})
+    yield b"]}"
+
+def render_schedule(day: date, data) -> bytes:
+    return JSONRenderer().render({"date": str(day), "sessions": data})
+
+def is_session_public(session) -> bool:
+    return session.status == SessionStatus.ACTIVE and session.hall.is_active and session.movie.is_active
+
+def session_payload(session, occupancy, prices, held_seats) -> dict:
+    held = [{"row": r, "seat": n} for r, n in held_seats if not occupancy.is_occupied(r, n)]
+    return {
+        "session": SessionSerializer(session).data,
+        "hall_seats": occupancy.layout.seat_map(),
+        "occupied": occupancy.occupied(),
+        "held": held,
+        "prices": {"standard": str(prices.standard_price), "vip": str(prices.vip_price)},
+    }
+
+def ticket_payload(ticket) -> dict:
+    return {
+        "code": str(ticket.code),
+        "session_id": ticket.session_id,
+        "movie": ticket.session.movie.title,
+        "hall": ticket.session.hall.name,
+        "starts_at": ticket.session.starts_at.isoformat(),
+        "row": ticket.row_snapshot,
+        "seat": ticket.seat_snapshot,
+        "seat_type": ticket.seat_type_snapshot,
+        "price": str(ticket.price_snapshot),
+        # Tickets of a cancelled booking or session stay readable but are no longer valid.
+        "status": "CANCELLED" if ticket.cancelled_at else "VALID",
+        "cancelled_at": ticket.cancelled_at.isoformat() if ticket.cancelled_at else None,
+    }
+
+TICKET_RELATED = ("session","seat","booking","session__movie","session__hall")
 
 class ScheduleView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        date_str = request.query_params.get("date")
-        if date_str:
-            try:
-                day = datetime.fromisoformat(date_str).date()
-            except ValueError:
-                return Response({"detail":"Некорректная дата."}, status=400)
-        else:
-            day = timezone.localdate()
+        try:
+            day = parse_schedule_day(request.query_params.get("date"))
+        except ValueError:
+            return Response({"detail":"Некорректная дата."}, status=400)
 
-        start = datetime.combine(day, datetime.min.time()).astimezone(timezone.get_current_timezone())
-        end = start + timedelta(days=1)
+        version = caches.schedule_version(day)
+        entry = caches.get_schedule(version, day)
+        if entry is None:
+            data = session_values.serialize(schedule_sessions(day))
+            entry = caches.store_schedule(version, day, render_schedule(day, data))
+        return caches.conditional_json_response(request, entry)
 
-        sessions = (Session.objects
-            .select_related("movie","hall")
-            .filter(starts_at__gte=start, starts_at__lt=end, status=SessionStatus.ACTIVE, hall__is_active=True, movie__is_active=True)
-            .order_by("starts_at")
-        )
+class ScheduleRangeView(APIView):
+    """Schedule of up to ScheduleRangeQuerySerializer.MAX_DAYS days grouped by day.
 
-        data = SessionSerializer(sessions, many=True).data
-        return Response({"date": str(day), "sessions": data})
+    Ranges longer than STREAM_DAYS are streamed day by day from a server-side cursor.
+    """
+    permission_classes = [AllowAny]
+    STREAM_DAYS = 7
+
+    def get(self, request):
+        ser = ScheduleRangeQuerySerializer(data=request.query_params)
+        ser.is_valid(raise_exception=True)
+        q = ser.validated_data
+        date_from, date_to = q["date_from"], q["date_to"]
+        rows = schedule_range_sessions(date_from, date_to, q.get("hall"), q.get("movie")).values(*schedule_range_values.lookups)
+
+        if (date_to - date_from).days >= self.STREAM_DAYS:
+            days = schedule_range_days(date_from, date_to, rows.iterator(chunk_size=500))
+            return StreamingHttpResponse(render_schedule_range(date_from, date_to, days), content_type="application/json")
+        days = schedule_range_days(date_from, date_to, list(rows))
+        return HttpResponse(b"".join(render_schedule_range(date_from, date_to, days)), content_type="application/json")
 
 class SessionPublicView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, pk: int):
         session = get_object_or_404(Session.objects.select_related("hall","movie"), pk=pk)
-        if session.status != SessionStatus.ACTIVE or not session.hall.is_active or not session.movie.is_active:
+        if not is_session_public(session):
             return Response({"detail":"Сеанс недоступен."}, status=404)
 
-        seats = Seat.objects.filter(hall=session.hall).order_by("row","number")
-        occupied = Ticket.objects.filter(session=session).values_list("row_snapshot","seat_snapshot")
-        occupied_list = [{"row": r, "seat": s} for r,s in occupied]
+        occupancy = get_session_occupancy(session)
+        return Response(session_payload(session, occupancy, get_hall_prices(session.hall), hold_store.held_seats(session.pk)))
 
-        prices, _ = HallPrice.objects.get_or_create(hall=session.hall, defaults={"standard_price":0, "vip_price":0})
+class BookSessionPublicView(APIView):
+    permission_classes = [AllowAny]
 
-        # Provide full seat map
-        seat_map = [{
-            "row": s.row,
-            "seat": s.number,
-            "type": s.seat_type
-        } for s in seats]
+    def post(self, request, pk: int):
+        serializer = BookingCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        seats = [(s["row"], s["seat"]) for s in serializer.validated_data["seats"]]
 
-        return Response({
-            "session": SessionSerializer(session).data,
-            "hall_seats": seat_map,
-            "occupied": occupied_list,
-            "prices": {"standard": str(prices.standard_price), "vip": str(prices.vip_price)},
-        })
+        # Retries with the same Idempotency-Key get the first attempt's booking back.
+        request_key = None
+        key = request.headers.get(idempotency.HEADER)
+        if key is not None:
+            if not key or len(key) > idempotency.MAX_KEY_LENGTH:
+                return Response({"detail": f"Некорректный {idempotency.HEADER}."}, status=400)
+            request_key = (idempotency.scoped_key(key, serializer.validated_data),
+                           idempotency.fingerprint(pk, serializer.validated_data))
+        try:
+            # Second pass: a concurrent attempt with this key committed while we waited on it.
+            # Its row can be gone by the time we read it (expired, booking deleted); then book anew.
+            for _ in range(2):
+                booking = idempotency.replay(*request_key) if request_key else None
+                if booking is not None:
+                    return Response(BookingSerializer(booking).data, status=201, headers={"Idempotent-Replayed": "true"})
+                try:
+                    booking = create_booking(
+                        session_id=pk,
+                        customer_name=serializer.validated_data["customer_name"],
+                        customer_email=serializer.validated_data.get("customer_email"),
+                        customer_phone=serializer.validated_data.get("customer_phone"),
+                        seats=seats,
+                        request_key=request_key,
+                    )
+                    return Response(BookingSerializer(booking).data, status=201)
+                except idempotency.DuplicateRequest:
+                    continue
+        except idempotency.KeyReused as e:
+            return Response({"detail": str(e)}, status=422)
+        except BookingConflict as e:
+            return Response({"detail": str(e)}, status=409)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response({"detail": f"Запрос с этим {idempotency.HEADER} ещё обрабатывается, повторите позже."}, status=409)
 
-class BookSessionPublicView(APIView):
+class BookBestSeatsPublicView(APIView):
+    """Book ``count`` seats chosen by the server (see allocator.py)."""
     permission_classes = [AllowAny]
 
     def post(self, request, pk: int):
-        serializer = BookingCreateSerializer(data=request.data)
+        serializer = BestSeatsBookingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        prefs = allocator.Preferences(
+            count=data["count"],
+            seat_type=data.get("seat_type"),
+            row_from=data.get("row_from"),
+            row_to=data.get("row_to"),
+            centre=data["centre"],
+            contiguous=data["contiguous"],
+        )
+        try:
+            booking = book_best_available(
+                session_id=pk,
+                prefs=prefs,
+                customer_name=data["customer_name"],
+                customer_email=data.get("customer_email"),
+                customer_phone=data.get("customer_phone"),
+            )
+        except BookingConflict as e:
+            return Response({"detail": str(e)}, status=409)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response(BookingSerializer(booking).data, status=201)
+
+def _hold_payload(hold):
+    return {
+        "token": hold.token,
+        "session_id": hold.session_id,
+        "seats": [{"row": r, "seat": n} for r, n in hold.seats],
+        "expires_at": hold.expires_at_dt.isoformat(),
+    }
+
+class SeatHoldView(APIView):
+    permission_classes = [AllowAny]
+
+    def post(self, request, pk: int):
+        serializer = SeatHoldCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         seats = [(s["row"], s["seat"]) for s in serializer.validated_data["seats"]]
         try:
-            booking = create_booking(
+            hold = hold_seats(pk, seats, serializer.validated_data.get("minutes"))
+        except BookingConflict as e:
+            return Response({"detail": str(e)}, status=409)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response(_hold_payload(hold), status=201)
+
+class SeatHoldDetailView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request, pk: int, token: str):
+        hold = hold_store.get(token)
+        if hold is None or hold.session_id != pk:
+            return Response({"detail":"Бронь не найдена или истекла."}, status=404)
+        return Response(_hold_payload(hold))
+
+    def delete(self, request, pk: int, token: str):
+        hold = hold_store.get(token)
+        if hold is None or hold.session_id != pk:
+            return Response({"detail":"Бронь не найдена или истекла."}, status=404)
+        hold_store.release(token)
+        return Response(status=204)
+
+class SeatHoldConfirmView(APIView):
+    permission_classes = [AllowAny]
+
+    def post(self, request, pk: int, token: str):
+        serializer = BookingCustomerSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            booking = confirm_hold(
                 session_id=pk,
+                token=token,
                 customer_name=serializer.validated_data["customer_name"],
                 customer_email=serializer.validated_data.get("customer_email"),
                 customer_phone=serializer.validated_data.get("customer_phone"),
-                seats=seats,
             )
         except BookingConflict as e:
             return Response({"detail": str(e)}, status=409)
@@ -108,30 +345,28 @@ class TicketPublicView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, code: str):
-        ticket = get_object_or_404(Ticket.objects.select_related("session","seat","booking","session__movie","session__hall"), code=code)
-        return Response({
-            "code": str(ticket.code),
-            "session_id": ticket.session_id,
-            "movie": ticket.session.movie.title,
-            "hall": ticket.session.hall.name,
-            "starts_at": ticket.session.starts_at.isoformat(),
-            "row": ticket.row_snapshot,
-            "seat": ticket.seat_snapshot,
-            "seat_type": ticket.seat_type_snapshot,
-            "price": str(ticket.price_snapshot),
-        })
+        ticket = get_object_or_404(Ticket.objects.select_related(*TICKET_RELATED), code=code)
+        return Response(ticket_payload(ticket))
 
 class TicketQrView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, code: str):
-        ticket = get_object_or_404(Ticket, code=code)
-        # По ТЗ в билете обязательно указывать сеанс, ряд и место.
-        payload = f"ticket:{ticket.code}|session:{ticket.session_id}|row:{ticket.row_snapshot}|seat:{ticket.seat_snapshot}"
-        img = qrcode.make(payload)
-        buf = BytesIO()
-        img.save(buf, format="PNG")
-        return HttpResponse(buf.getvalue(), content_type="image/png")
+        # Строку билета читаем всегда: QR отменённого билета больше не отдаём
+        ticket = get_object_or_404(
+            Ticket.objects.only("code", "session_id", "row_snapshot", "seat_snapshot", "cancelled_at"), code=code)
+        if ticket.cancelled_at:
+            return Response({"detail": "Билет отменён."}, status=410)
+        entry = qr.cache.get_by_code(code) or qr.cache.put(ticket.code, qr.ticket_qr_payload(ticket))
+        digest, png = entry
+        etag = f'"{digest}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(png, content_type="image/png")
+        response["ETag"] = etag
+        # Картинка не меняется, но билет могут отменить: клиент сверяет ETag (304)
+        response["Cache-Control"] = "public, no-cache"
+        return response
 
 # --------- ADMIN (CRUD) ---------
 class HallAdminViewSet(viewsets.ModelViewSet):
@@ -142,19 +377,11 @@ class HallAdminViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["post"])
     def generate_seats(self, request, pk=None):
         hall = self.get_object()
-        # Create or update seat grid to match rows/cols.
-        # Strategy: delete seats that are outside range, create missing as STANDARD.
-        Seat.objects.filter(hall=hall, row__gt=hall.rows_count).delete()
-        Seat.objects.filter(hall=hall, number__gt=hall.seats_per_row).delete()
-        existing = set(Seat.objects.filter(hall=hall).values_list("row","number"))
-        to_create = []
-        for r in range(1, hall.rows_count+1):
-            for n in range(1, hall.seats_per_row+1):
-                if (r,n) not in existing:
-                    to_create.append(Seat(hall=hall, row=r, number=n, seat_type="STANDARD"))
-        if to_create:
-            Seat.objects.bulk_create(to_create)
-        return Response({"detail":"OK"})
+        ser = GenerateSeatsSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        # Create or update seat grid to match rows/cols, then apply the optional seat-type layout.
+        counts = regenerate_seat_grid(hall, ser.validated_data.get("layout"))
+        return Response({"detail":"OK", **counts})
 
 class SeatAdminViewSet(viewsets.ModelViewSet):
     queryset = Seat.objects.select_related("hall").all()
@@ -166,28 +393,192 @@ class HallPriceAdminView(APIView):
 
     def get(self, request, hall_id: int):
         hall = get_object_or_404(Hall, pk=hall_id)
-        prices, _ = HallPrice.objects.get_or_create(hall=hall, defaults={"standard_price":0, "vip_price":0})
-        return Response(HallPriceSerializer(prices).data)
+        return Response(HallPriceSerializer(get_hall_prices(hall)).data)
 
     def put(self, request, hall_id: int):
         hall = get_object_or_404(Hall, pk=hall_id)
-        prices, _ = HallPrice.objects.get_or_create(hall=hall, defaults={"standard_price":0, "vip_price":0})
+        prices = HallPrice.objects.filter(hall=hall).first() or HallPrice(hall=hall)
         ser = HallPriceSerializer(prices, data=request.data)
         ser.is_valid(raise_exception=True)
         ser.save()
         return Response(ser.data)
 
+class TicketScanAdminView(APIView):
+    """Entrance scanners: admit a batch of codes, one status per code."""
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        ser = TicketScanSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        results = admit_tickets(((code, None) for code in ser.validated_data["codes"]), ser.validated_data.get("session_id"))
+        return Response({"results": TicketScanResultSerializer(results, many=True).data})
+
+class TicketSyncAdminView(APIView):
+    """Offline scanners: upload admissions recorded against a session manifest."""
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        ser = TicketSyncSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        scans = ((a["code"], a["scanned_at"]) for a in ser.validated_data["admissions"])
+        results = admit_tickets(scans, ser.validated_data["session_id"])
+        return Response({"results": TicketScanResultSerializer(results, many=True).data})
+
+class SalesReportAdminView(APIView):
+    """Sales by any of day/movie/hall/seat_type over a date range, from the summary tables."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        ser = ReportQuerySerializer(data=request.query_params)
+        ser.is_valid(raise_exception=True)
+        reports.refresh()
+        q = ser.validated_data
+        return Response(reports.sales(q["date_from"], q["date_to"], q["group_by"]))
+
+class SeatHeatmapAdminView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, hall_id: int):
+        hall = get_object_or_404(Hall, pk=hall_id)
+        ser = ReportQuerySerializer(data=request.query_params)
+        ser.is_valid(raise_exception=True)
+        reports.refresh()
+        return Response(reports.seat_heatmap(hall, ser.validated_data["date_from"], ser.validated_data["date_to"]))
+
+class RequestMetricsAdminView(APIView):
+    """Aggregated RequestMetricsMiddleware samples of this worker process."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "enabled": settings.REQUEST_METRICS_SAMPLE_RATE > 0,
+            "sample_rate": settings.REQUEST_METRICS_SAMPLE_RATE,
+            "views": metrics_registry.snapshot(),
+        })
+
+    def delete(self, request):
+        metrics_registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 class MovieAdminViewSet(viewsets.ModelViewSet):
     queryset = Movie.objects.all().order_by("id")
     serializer_class = MovieSerializer
     permission_classes = [IsAdminUser]
 
+_BOOKING_CSV_HEADER = [
+    "id", "created_at", "status", "customer_name", "customer_email", "customer_phone",
+    "session_id", "movie", "hall", "starts_at", "tickets", "seats", "total",
+]
+
+def _bookings_csv(rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(_BOOKING_CSV_HEADER)
+    for row in rows:
+        session = row["session"]
+        tickets = row["tickets"]
+        writer.writerow([
+            row["id"], row["created_at"], row["status"],
+            row["customer_name"], row["customer_email"] or "", row["customer_phone"] or "",
+            session["id"], session["movie"]["title"], session["hall"]["name"], session["starts_at"],
+            len(tickets),
+            " ".join(f"{t['row_snapshot']}-{t['seat_snapshot']}" for t in tickets),
+            sum((Decimal(t["price_snapshot"]) for t in tickets), Decimal("0.00")),
+        ])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+
+def _tickets_zip_response(tickets, filename: str) -> StreamingHttpResponse:
+    rows = (tickets
+        .order_by("row_snapshot", "seat_snapshot")
+        .values_list("code", "session_id", "row_snapshot", "seat_snapshot")
+        .iterator(chunk_size=500))
+    response = StreamingHttpResponse(qr.stream_tickets_zip(rows), content_type="application/zip")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
 class SessionAdminViewSet(viewsets.ModelViewSet):
     queryset = Session.objects.select_related("movie","hall").all().order_by("-starts_at")
-    serializer_class = SessionSerializer
+    serializer_class = SessionAdminSerializer
     permission_classes = [IsAdminUser]
 
+    def perform_create(self, serializer):
+        self._save(serializer)
+
+    def perform_update(self, serializer):
+        self._save(serializer)
+
+    def _save(self, serializer):
+        # Пересечения ловит ограничение в БД
+        try:
+            with session_overlap_errors():
+                serializer.save()
+        except ScheduleConflict:
+            raise ValidationError({"non_field_errors": ["Сеанс пересекается с другим сеансом в этом зале."]})
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        ser = SessionBulkCreateSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        try:
+            sessions = bulk_create_sessions(ser.validated_data["sessions"])
+        except ScheduleConflict as e:
+            return Response({"detail": str(e), "conflicts": e.conflicts}, status=409)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response(SessionAdminSerializer(sessions, many=True).data, status=201)
+
+    @action(detail=True, methods=["post"])
+    def cancel(self, request, pk=None):
+        counts = cancel_session(pk)
+        session = self.get_queryset().get(pk=pk)
+        return Response({"cancelled": counts, "session": SessionAdminSerializer(session).data})
+
+    @action(detail=True, methods=["get"])
+    def manifest(self, request, pk=None):
+        return Response(ticket_manifest(self.get_object()))
+
+    @action(detail=True, methods=["get"], url_path="tickets.zip")
+    def tickets_zip(self, request, pk=None):
+        session = self.get_object()
+        return _tickets_zip_response(Ticket.objects.filter(session=session, cancelled_at__isnull=True), f"session-{session.pk}-tickets.zip")
+
 class BookingAdminViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     queryset = Booking.objects.select_related("session","session__movie","session__hall").prefetch_related("tickets").order_by("-created_at")
     serializer_class = BookingSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = KeysetPagination
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(booking_values.serialize(page))
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """Весь список броней потоком: ?fmt=ndjson (по умолчанию) или ?fmt=csv."""
+        fmt = request.query_params.get("fmt", "ndjson")
+        if fmt not in ("ndjson", "csv"):
+            return Response({"detail":"Формат: ndjson или csv."}, status=400)
+        rows = iter_keyset(self.filter_queryset(self.get_queryset()), booking_values.serialize)
+        if fmt == "csv":
+            response = StreamingHttpResponse(_bookings_csv(rows), content_type="text/csv; charset=utf-8")
+        else:
+            renderer = JSONRenderer()
+            response = StreamingHttpResponse((renderer.render(row) + b"\n" for row in rows), content_type="application/x-ndjson")
+        response["Content-Disposition"] = f'attachment; filename="bookings.{fmt}"'
+        return response
+
+    @action(detail=True, methods=["post"])
+    def cancel(self, request, pk=None):
+        try:
+            cancel_booking(pk)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response(BookingSerializer(self.get_queryset().get(pk=pk)).data)
+
+    @action(detail=True, methods=["get"], url_path="tickets.zip")
+    def tickets_zip(self, request, pk=None):
+        booking = self.get_object()
+        return _tickets_zip_response(Ticket.objects.filter(booking=booking, cancelled_at__isnull=True), f"booking-{booking.pk}-tickets.zip")
@@ -1,6 +1,7 @@
 from pathlib import Path
 from datetime import timedelta
 import os
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -19,6 +20,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 
     "corsheaders",
     "rest_framework",
@@ -27,6 +29,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "apps.cinema.middleware.RequestMetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -88,6 +91,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 CORS_ALLOWED_ORIGINS = os.getenv("CORS_ALLOWED_ORIGINS", "http://localhost:5173,http://localhost:3000").split(",")
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
@@ -102,3 +106,39 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
 }
+
+# Временная бронь мест (минуты) и период фоновой очистки истёкших броней (секунды)
+SEAT_HOLD_MINUTES = int(os.getenv("SEAT_HOLD_MINUTES", "10"))
+SEAT_HOLD_MAX_MINUTES = int(os.getenv("SEAT_HOLD_MAX_MINUTES", "15"))
+SEAT_HOLD_SWEEP_SECONDS = int(os.getenv("SEAT_HOLD_SWEEP_SECONDS", "30"))
+# Хранилище броней: DatabaseHoldStore — общее для всех воркеров, HoldStore — память процесса (только один воркер)
+SEAT_HOLD_STORE = os.getenv("SEAT_HOLD_STORE", "apps.cinema.holds.DatabaseHoldStore")
+
+# Сколько секунд хранить отрендеренное расписание на день (сбрасывается при изменении сеансов/фильмов/залов)
+SCHEDULE_CACHE_SECONDS = int(os.getenv("SCHEDULE_CACHE_SECONDS", "3600"))
+
+# QR-коды билетов: размер LRU-кэша PNG в байтах и фоновая генерация после продажи
+QR_CACHE_MAX_BYTES = int(os.getenv("QR_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+QR_PREGENERATE = os.getenv("QR_PREGENERATE", "1") == "1"
+QR_PREGENERATE_WORKERS = int(os.getenv("QR_PREGENERATE_WORKERS", "2"))
+QR_EXPORT_WORKERS = int(os.getenv("QR_EXPORT_WORKERS", "2"))  # процессы для пакетной выгрузки QR (ZIP)
+
+# Метрики запросов: доля замеряемых запросов (0 — выключено, 1 — все) и заголовок Server-Timing
+REQUEST_METRICS_SAMPLE_RATE = float(os.getenv("REQUEST_METRICS_SAMPLE_RATE", "0"))
+REQUEST_METRICS_SERVER_TIMING = os.getenv("REQUEST_METRICS_SERVER_TIMING", "1") == "1"
+
+# Асинхронные версии публичных эндпоинтов (расписание, сеанс, билет) — имеет смысл под ASGI (uvicorn config.asgi:application)
+ASYNC_PUBLIC_VIEWS = os.getenv("ASYNC_PUBLIC_VIEWS", "0") == "1"
+
+# Поток событий схемы зала (SSE): брокер (LocalBroker — один процесс, PostgresBroker — несколько воркеров) и период keepalive
+SEAT_EVENTS_BROKER = os.getenv("SEAT_EVENTS_BROKER", "apps.cinema.events.LocalBroker")
+SEAT_EVENTS_KEEPALIVE_SECONDS = int(os.getenv("SEAT_EVENTS_KEEPALIVE_SECONDS", "15"))
+
+# Сколько часов помнить Idempotency-Key публичной брони (повтор запроса вернёт ту же бронь)
+BOOKING_IDEMPOTENCY_TTL_HOURS = int(os.getenv("BOOKING_IDEMPOTENCY_TTL_HOURS", "24"))
+
+# Как create_booking разрешает гонку за места: constraint | nowait | skip_locked | advisory (см. services.BOOKING_MODES)
+BOOKING_CONCURRENCY_MODE = os.getenv("BOOKING_CONCURRENCY_MODE", "constraint")
+
+# Сколько секунд хранить страницы каталога фильмов и результатов поиска (сбрасывается при изменении фильмов)
+MOVIE_SEARCH_CACHE_SECONDS = int(os.getenv("MOVIE_SEARCH_CACHE_SECONDS", "60"))
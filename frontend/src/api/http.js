@@ -1,4 +1,4 @@
-const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8000/api'
+export const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8000/api'
 
 export async function apiGet(path, token) {
   const res = await fetch(`${API_BASE}${path}`, {
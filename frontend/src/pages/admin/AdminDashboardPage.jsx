@@ -24,7 +24,7 @@ export default function AdminDashboardPage() {
       setHalls(h)
       setMovies(m)
       setSessions(s)
-      setBookings(b)
+      setBookings(b.results)
     } catch (e) {
       setErr(e.detail || 'Ошибка загрузки')
     }
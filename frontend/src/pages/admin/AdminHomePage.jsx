@@ -20,7 +20,8 @@ export default function AdminHomePage() {
           halls: halls.length,
           movies: movies.length,
           sessions: sessions.length,
-          bookings: bookings.length
+          // список броней постраничный: показываем размер первой страницы
+          bookings: bookings.results.length + (bookings.next ? '+' : '')
         })
       })
       .catch(setErr)
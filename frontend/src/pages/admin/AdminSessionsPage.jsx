@@ -117,6 +117,8 @@ export default function AdminSessionsPage() {
       <td>{new Date(s.starts_at).toLocaleTimeString('ru-RU', { hour: '2-digit', minute: '2-digit' })}</td>
       <td>{s.movie.title}</td>
       <td>{s.hall.name}</td>
+      <td>{s.sold_count} / {s.hall.capacity}</td>
+      <td>{s.revenue}</td>
       <td>
         <button type="button" className="admin-btn" onClick={() => openEdit(s)}>Редактировать</button>
       </td>
@@ -152,13 +154,15 @@ export default function AdminSessionsPage() {
               <th>Время</th>
               <th>Фильм</th>
               <th>Зал</th>
+              <th>Продано</th>
+              <th>Выручка</th>
               <th />
             </tr>
           </thead>
           <tbody>
             {rows}
             {sessions.length === 0 && (
-              <tr><td colSpan="4" style={{opacity:.8}}>На выбранную дату ({date}) сеансов нет</td></tr>
+              <tr><td colSpan="6" style={{opacity:.8}}>На выбранную дату ({date}) сеансов нет</td></tr>
             )}
           </tbody>
         </table>
@@ -1,6 +1,6 @@
 import React, { useEffect, useMemo, useState } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
-import { apiGet, apiPost } from '../../api/http.js'
+import { API_BASE, apiGet, apiPost } from '../../api/http.js'
 import Modal from '../../components/Modal.jsx'
 
 function money(v) {
@@ -23,13 +23,48 @@ export default function HallPage() {
       .catch(setErr)
   }, [id])
 
+  // Живые изменения схемы зала: снимок при подключении, затем только дельты
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return
+    const es = new EventSource(`${API_BASE}/sessions/${id}/events/`)
+    const key = s => `${s.row}-${s.seat}`
+    const apply = fn => e => {
+      const ev = JSON.parse(e.data)
+      setData(prev => (prev ? fn(prev, ev) : prev))
+    }
+    es.addEventListener('snapshot', apply((prev, ev) => ({ ...prev, occupied: ev.occupied, held: ev.held })))
+    es.addEventListener('occupied', apply((prev, ev) => ({ ...prev, occupied: [...prev.occupied, ...ev.seats] })))
+    es.addEventListener('freed', apply((prev, ev) => {
+      const gone = new Set(ev.seats.map(key))
+      return { ...prev, occupied: prev.occupied.filter(s => !gone.has(key(s))) }
+    }))
+    es.addEventListener('cancelled', () => {
+      es.close()
+      setData(null)
+      setErr({ detail: 'Сеанс отменён.' })
+    })
+    es.addEventListener('held', apply((prev, ev) => ({ ...prev, held: [...(prev.held || []), ...ev.seats] })))
+    es.addEventListener('released', apply((prev, ev) => {
+      const gone = new Set(ev.seats.map(key))
+      return { ...prev, held: (prev.held || []).filter(s => !gone.has(key(s))) }
+    }))
+    return () => es.close()
+  }, [id])
+
   const occupiedSet = useMemo(() => {
     const set = new Set()
     if (!data) return set
     data.occupied.forEach(o => set.add(`${o.row}-${o.seat}`))
+    // Места во временной брони других покупателей тоже недоступны
+    ;(data.held || []).forEach(o => set.add(`${o.row}-${o.seat}`))
     return set
   }, [data])
 
+  // Места, которые заняли другие, снимаются из выбора
+  useEffect(() => {
+    setSelected(prev => prev.filter(s => !occupiedSet.has(`${s.row}-${s.seat}`)))
+  }, [occupiedSet])
+
   const seatTypeMap = useMemo(() => {
     const m = new Map()
     if (!data) return m